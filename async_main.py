@@ -0,0 +1,200 @@
+"""
+asyncio runtime for the bot: same handlers as main.py on AsyncTeleBot.
+
+Mongo and the other blocking helpers from main.py run on a bounded thread
+pool, and at most MAX_CONCURRENT_REQUESTS date queries are handled at once,
+so one slow query or forward no longer holds up every other chat.
+
+    python async_main.py
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime as dt
+
+import aiohttp
+from pymongo import ASCENDING
+from telebot import asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+
+from log import add_log
+from main import (
+    BOT_COMMANDS,
+    FUTURE_TEXT,
+    HELP_TEXT,
+    INPUT_HELP_HINT,
+    NOT_FOUND_TEXT,
+    RANGE_HINT,
+    WELCOME_TEXT,
+    collection,
+    distance_notice,
+    find_snapshot,
+    range_text,
+    received_text,
+    render_snapshot,
+    timestamp_index,
+)
+from metrics import metrics, serve_metrics
+from parsers import parse_date_and_time, tehran_tz
+from secret import *
+
+bot = AsyncTeleBot(TELEGRAM_BOT_TOKEN)
+request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+
+async def run_blocking(func, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(
+        None, lambda: func(*args, **kwargs)
+    )
+
+
+# ===== TELEGRAM BOT HANDLERS =====
+@bot.message_handler(commands=["start"])
+async def send_welcome(message):
+    await bot.reply_to(message, WELCOME_TEXT)
+
+
+@bot.message_handler(commands=["input_help"])
+async def input_help_handler(message):
+    await bot.send_message(message.chat.id, HELP_TEXT, parse_mode="HTML")
+
+
+@bot.message_handler(commands=["stats"], func=lambda m: m.from_user.id in ADMIN_IDS)
+async def stats_handler(message):
+    await bot.send_message(
+        message.chat.id, f"```\n{metrics.report()}\n```", parse_mode="Markdown"
+    )
+
+
+@bot.message_handler(commands=["range"])
+async def range_handler(message):
+    async with request_slots:
+        metrics.inc("range_requests")
+        try:
+            with metrics.timer("range"):
+                txt = await run_blocking(range_text, message.text)
+            if txt:
+                await bot.send_message(message.chat.id, txt, parse_mode="Markdown")
+            else:
+                await bot.reply_to(message, NOT_FOUND_TEXT)
+        except ValueError as e:
+            metrics.inc("invalid_input")
+            await bot.reply_to(message, f"{str(e)}\n{RANGE_HINT}")
+        except Exception as e:
+            metrics.inc("errors")
+            error = f"❌ مشکلی پیش آمده:\n{str(e)}"
+            await bot.reply_to(message, error)
+            add_log(error)
+
+
+@bot.message_handler(func=lambda message: True)
+async def handle_date_input(message):
+    async with request_slots:
+        with metrics.timer("total"):
+            await _handle_date_input(message)
+
+
+async def _handle_date_input(message):
+    chat_id = message.chat.id
+    metrics.inc("requests")
+    try:
+        with metrics.timer("parse"):
+            result = parse_date_and_time(message.text)
+
+        if result > dt.now(tehran_tz):
+            metrics.inc("future")
+            await bot.reply_to(message, FUTURE_TEXT)
+            return
+        else:
+            with metrics.timer("reply"):
+                await bot.reply_to(message, received_text(result))
+
+        # Get the closest message for that datetime
+        with metrics.timer("lookup"):
+            msg = await run_blocking(find_snapshot, result)
+
+        notice = distance_notice(msg, result)
+        if notice:
+            await bot.reply_to(message, notice)
+
+        if msg and "message_id" in msg:
+            try:
+                msg_id = int(msg["message_id"])
+                with metrics.timer("forward"):
+                    await bot.forward_message(chat_id, f"@{CHANNEL_USERNAME}", msg_id)
+                metrics.inc("forwarded")
+            except Exception as e:
+                metrics.inc("forward_fallbacks")
+                await send_rendered(chat_id, msg)
+        elif msg:
+            await send_rendered(chat_id, msg)
+        else:
+            metrics.inc("not_found")
+            await bot.reply_to(message, NOT_FOUND_TEXT)
+    except ValueError as e:
+        metrics.inc("invalid_input")
+        err = f"{str(e)}\n{INPUT_HELP_HINT}"
+        await bot.reply_to(message, err)
+        add_log(
+            f"ValueError in parse_date_and_time:\nMessage Text: {message.text}\n{str(e)}"
+        )
+    except Exception as e:
+        metrics.inc("errors")
+        error = f"❌ مشکلی پیش آمده:\n{str(e)}"
+        await bot.reply_to(message, error)
+        add_log(error)
+
+
+async def send_rendered(chat_id, msg):
+    with metrics.timer("render"):
+        txt = await run_blocking(render_snapshot, msg["_id"], msg.get("updated"))
+    with metrics.timer("send"):
+        await bot.send_message(
+            chat_id,
+            txt,
+            parse_mode="Markdown",
+            disable_web_page_preview=True,
+        )
+    metrics.inc("rendered")
+
+
+def use_socks_proxy(server, port):
+    """aiohttp has no SOCKS support of its own, so swap in aiohttp_socks."""
+    from aiohttp_socks import ProxyConnector, ProxyType
+
+    session_manager = asyncio_helper.session_manager
+
+    async def create_session():
+        connector = ProxyConnector(
+            proxy_type=ProxyType.SOCKS5,
+            host=server,
+            port=int(port),
+            rdns=True,
+            limit=asyncio_helper.REQUEST_LIMIT,
+            ssl=session_manager.ssl_context,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    session_manager.create_session = create_session
+
+
+async def main():
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(MAX_CONCURRENT_REQUESTS, thread_name_prefix="bot-io")
+    )
+    await bot.set_my_commands(BOT_COMMANDS)
+    await run_blocking(collection.create_index, [("timestamp", ASCENDING)])
+    await run_blocking(timestamp_index.start)
+    print(f"Timestamp index warmed with {len(timestamp_index)} snapshots")
+    if METRICS_PORT:
+        serve_metrics(METRICS_HOST, METRICS_PORT)
+    print("Bot is Polling (asyncio) ...")
+    add_log(f"Bot Started at {dt.now(tehran_tz).strftime('%Y-%m-%d %H:%M:%S')}")
+    await bot.polling(non_stop=True)
+    add_log(f"Bot Stopped at {dt.now(tehran_tz).strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+if __name__ == "__main__":
+    if PROXY_SERVER and PROXY_PORT:
+        use_socks_proxy(PROXY_SERVER, PROXY_PORT)
+    asyncio.run(main())
@@ -1,3 +1,5 @@
+from lru import LRUCache
+
 gold_dict = {
     "ounce": "اونس طلا",
     "tehran_market_price": "مظنه بازار تهران",
@@ -31,6 +33,14 @@ usdt_link = {
 }
 
 
+class RenderCache(LRUCache):
+    """
+    Bounded LRU of rendered snapshot messages keyed by ``(_id, updated)``.
+    Edits to a channel post bump the snapshot's ``updated`` field, so a
+    stale render is never looked up again and just ages out.
+    """
+
+
 def to_str(price):
     price = str(price)
     price = price.replace(",", "")
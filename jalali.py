@@ -0,0 +1,102 @@
+"""
+Table-driven Jalali <-> Gregorian conversion and Tehran local time.
+
+The bot only accepts Jalali years 1395-1424 (Gregorian 2015-2044), so every
+day of 1394-1425 is tabulated once at import, about 11.7k days in a few
+compact arrays. Both directions are then an index lookup instead of the
+arithmetic in ``jdatetime``, which stays the fallback outside the table.
+
+Iran dropped daylight saving in 2022, so every instant after the last
+``Asia/Tehran`` transition is a fixed +03:30 and skips pytz's lookup.
+"""
+
+import datetime
+from array import array
+from bisect import bisect_right
+from datetime import datetime as dt, timedelta, timezone
+
+import jdatetime
+import pytz
+
+FIRST_YEAR = 1394
+LAST_YEAR = 1425
+
+tehran_tz = pytz.timezone("Asia/Tehran")
+TEHRAN_OFFSET = timedelta(hours=3, minutes=30)
+# Naive UTC instant of the last transition (DST ended at the midnight, in
+# +04:30, that began 1401/06/31) and the +03:30 tzinfo after it; the same
+# object pytz would attach, so results compare and print alike
+FIXED_SINCE_UTC = dt(2022, 9, 21, 19, 30)
+FIXED_SINCE_LOCAL = FIXED_SINCE_UTC + TEHRAN_OFFSET
+TEHRAN_FIXED = tehran_tz.localize(FIXED_SINCE_LOCAL + timedelta(days=1)).tzinfo
+
+
+def _build():
+    first = jdatetime.date(FIRST_YEAR, 1, 1).togregorian().toordinal()
+    # Offset of the first day of every Jalali month, plus one end marker
+    month_starts = array("I")
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        for month in range(1, 13):
+            start = jdatetime.date(year, month, 1).togregorian().toordinal()
+            month_starts.append(start - first)
+    end = jdatetime.date(LAST_YEAR + 1, 1, 1).togregorian().toordinal()
+    month_starts.append(end - first)
+    return first, month_starts
+
+
+EPOCH_ORDINAL, MONTH_STARTS = _build()
+DAYS = MONTH_STARTS[-1]
+
+
+def jalali_to_gregorian(year: int, month: int, day: int) -> datetime.date:
+    """Raises ValueError for days that do not exist, like jdatetime."""
+    if not (FIRST_YEAR <= year <= LAST_YEAR and 1 <= month <= 12):
+        return jdatetime.date(year, month, day).togregorian()
+    i = (year - FIRST_YEAR) * 12 + month - 1
+    start = MONTH_STARTS[i]
+    if not 1 <= day <= MONTH_STARTS[i + 1] - start:
+        raise ValueError("day is out of range for month")
+    return datetime.date.fromordinal(EPOCH_ORDINAL + start + day - 1)
+
+
+def gregorian_to_jalali(date: datetime.date):
+    """Return ``(year, month, day)`` of a Gregorian date."""
+    offset = date.toordinal() - EPOCH_ORDINAL
+    if not 0 <= offset < DAYS:
+        jd = jdatetime.date.fromgregorian(date=date)
+        return jd.year, jd.month, jd.day
+    i = bisect_right(MONTH_STARTS, offset) - 1
+    year, month = divmod(i, 12)
+    return FIRST_YEAR + year, month + 1, offset - MONTH_STARTS[i] + 1
+
+
+def format_jalali(dt_object: dt, with_time=True, sep="/") -> str:
+    """``YYYY/MM/DD   HH:MM`` of the wall-clock fields of ``dt_object``."""
+    year, month, day = gregorian_to_jalali(dt_object.date())
+    text = f"{year:04d}{sep}{month:02d}{sep}{day:02d}"
+    if with_time:
+        text += f"   {dt_object.hour:02d}:{dt_object.minute:02d}"
+    return text
+
+
+def utc_to_tehran(dt_object: dt) -> dt:
+    """Tehran local time of a naive UTC (as stored in Mongo) or aware datetime."""
+    if dt_object.tzinfo is not None:
+        dt_object = dt_object.astimezone(timezone.utc).replace(tzinfo=None)
+    if dt_object >= FIXED_SINCE_UTC:
+        return (dt_object + TEHRAN_OFFSET).replace(tzinfo=TEHRAN_FIXED)
+    return pytz.utc.localize(dt_object).astimezone(tehran_tz)
+
+
+def localize_tehran(dt_object: dt) -> dt:
+    """``tehran_tz.localize`` for naive Tehran wall-clock times."""
+    if dt_object >= FIXED_SINCE_LOCAL:
+        return dt_object.replace(tzinfo=TEHRAN_FIXED)
+    return tehran_tz.localize(dt_object)
+
+
+def tehran_to_utc(dt_object: dt) -> dt:
+    """Naive UTC of a naive Tehran wall-clock time."""
+    if dt_object >= FIXED_SINCE_LOCAL:
+        return dt_object - TEHRAN_OFFSET
+    return tehran_tz.localize(dt_object).astimezone(timezone.utc).replace(tzinfo=None)
@@ -1,25 +1,219 @@
+"""
+Ship log records to the Telegram log channel without blocking the caller.
+
+Records go through the standard ``logging`` module: anything logged on the
+``bazarbin`` logger (or a child such as ``bazarbin.scraper``) is queued and
+sent by one background thread, many lines per message, within Telegram's
+4096 character limit and at most LOG_RATE messages per minute. While the
+channel is unreachable lines are appended to LOG_SPILL_FILE and replayed
+once a send succeeds again.
+
+``add_log`` keeps its old signature and now only enqueues.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+
 import requests
-import telebot
 
+from scheduler import TokenBucket
 from secret import (
-    PROXY_SERVER,
+    LOG_CHANNEL_ID,
+    LOG_RATE,
+    LOG_SPILL_FILE,
     PROXY_PORT,
+    PROXY_SERVER,
     TELEGRAM_BOT_TOKEN,
-    LOG_CHANNEL_ID,
     TOKEN_LOGGING,
 )
 
+MESSAGE_LIMIT = 4096
+# Lines held in memory while rate limited before they go to the spill file
+BUFFER_LIMIT = 2000
 
-def add_log(the_error, is_scraper=None):
-    logging_bot = telebot.TeleBot(TOKEN_LOGGING)
+
+def proxies():
     if PROXY_SERVER and PROXY_PORT:
         proxy_url = f"socks5h://{PROXY_SERVER}:{PROXY_PORT}"
-        telebot.apihelper.proxy = {"http": proxy_url, "https": proxy_url}
-    log_channel_id = LOG_CHANNEL_ID
-    if is_scraper:
-        logging_bot.send_message(log_channel_id, f"{the_error}")
-    else:
-        logging_bot.send_message(log_channel_id, f"{get_bot_username()} - {the_error}")
+        return {"http": proxy_url, "https": proxy_url}
+    return None
+
+
+class TelegramHandler(logging.Handler):
+    def __init__(
+        self,
+        token,
+        chat_id,
+        rate=LOG_RATE,
+        spill_file=LOG_SPILL_FILE,
+        flush_interval=2.0,
+        queue_size=10000,
+    ):
+        super().__init__()
+        self.token = token
+        self.chat_id = chat_id
+        self.spill_file = spill_file
+        self.flush_interval = flush_interval
+        self.bucket = TokenBucket(rate / 60, max(1, rate // 6))
+        self.sent = self.spilled = self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._session = requests.Session()
+        self._session.proxies = proxies() or {}
+        self._username = None
+        self._username_checked = 0
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._closing = threading.Event()
+
+    def emit(self, record):
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((line, getattr(record, "scraper", False)))
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="log-shipper", daemon=True
+                )
+                self._thread.start()
+
+    def bot_username(self):
+        """getMe once; after a failure retry at most every minute."""
+        if self._username is None and time.monotonic() - self._username_checked > 60:
+            self._username_checked = time.monotonic()
+            self._username = get_bot_username(self._session.proxies or None)
+        return self._username
+
+    def _run(self):
+        pending = []
+        while True:
+            closing = self._closing.is_set()
+            try:
+                item = self._queue.get(timeout=0 if closing else self.flush_interval)
+                pending.append(item)
+                # Gather whatever else is already waiting
+                while len(pending) < BUFFER_LIMIT:
+                    pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not pending:
+                if closing:
+                    return
+                continue
+
+            lines = [
+                line if scraper else f"{self.bot_username()} - {line}"
+                for line, scraper in pending
+            ]
+            pending.clear()
+            reachable = True
+            for text in batches(lines):
+                # After one failure the rest of the round goes straight to disk
+                if reachable and (closing or self._wait_for_token()):
+                    reachable = self._send(text)
+                    if reachable:
+                        self._replay_spill()
+                        continue
+                self._spill(text)
+
+    def _wait_for_token(self):
+        # While waiting, new lines keep queueing and join the next batch
+        deadline = time.monotonic() + 60
+        while not self.bucket.take():
+            if time.monotonic() > deadline or self._closing.wait(1):
+                return False
+        return True
+
+    def _send(self, text):
+        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
+        try:
+            response = self._session.post(
+                url, data={"chat_id": self.chat_id, "text": text}, timeout=10
+            )
+            data = response.json()
+        except Exception as e:
+            print(f"Exception in TelegramHandler._send: {e}")
+            return False
+        if data.get("ok"):
+            self.sent += 1
+            return True
+        retry_after = data.get("parameters", {}).get("retry_after")
+        if retry_after and not self._closing.is_set():
+            self._closing.wait(retry_after)
+            return self._send(text)
+        print(f"Error in TelegramHandler._send: {data.get('description')}")
+        return False
+
+    def _spill(self, text):
+        try:
+            with open(self.spill_file, "a", encoding="utf-8") as f:
+                f.write(f"{text}\n\x1e\n")
+            self.spilled += 1
+        except OSError as e:
+            print(f"Exception in TelegramHandler._spill: {e}\n{text}")
+
+    def _replay_spill(self):
+        if not self.spill_file or not os.path.exists(self.spill_file):
+            return
+        try:
+            with open(self.spill_file, encoding="utf-8") as f:
+                spilled = f.read()
+            os.remove(self.spill_file)
+        except OSError as e:
+            print(f"Exception in TelegramHandler._replay_spill: {e}")
+            return
+        texts = [t.strip("\n") for t in spilled.split("\x1e") if t.strip()]
+        for text in batches(texts):
+            if not (self.bucket.take() and self._send(text)):
+                self._spill(text)
+
+    def close(self):
+        """Send what is queued (best effort, a few seconds) before exit."""
+        self._closing.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        super().close()
+
+
+def batches(lines, limit=MESSAGE_LIMIT):
+    """Join lines into messages of at most ``limit`` characters."""
+    batch = ""
+    for line in lines:
+        while len(line) > limit:
+            if batch:
+                yield batch
+                batch = ""
+            yield line[:limit]
+            line = line[limit:]
+        if batch and len(batch) + 2 + len(line) > limit:
+            yield batch
+            batch = ""
+        batch = f"{batch}\n\n{line}" if batch else line
+    if batch:
+        yield batch
+
+
+logger = logging.getLogger("bazarbin")
+logger.setLevel(logging.INFO)
+handler = TelegramHandler(TOKEN_LOGGING, LOG_CHANNEL_ID)
+logger.addHandler(handler)
+
+
+def add_log(the_error, is_scraper=None):
+    logger.error(the_error, extra={"scraper": bool(is_scraper)})
 
 
 def get_bot_username(proxies=None):
@@ -30,7 +224,7 @@ def get_bot_username(proxies=None):
                 "http": f"socks5h://{PROXY_SERVER}:{PROXY_PORT}",
                 "https": f"socks5h://{PROXY_SERVER}:{PROXY_PORT}",
             }
-        response = requests.get(url, proxies=proxies)
+        response = requests.get(url, proxies=proxies, timeout=10)
         data = response.json()
         if data["ok"]:
             return data["result"]["username"]
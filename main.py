@@ -1,29 +1,57 @@
 from datetime import datetime as dt
 
-import jdatetime
-import pytz
 import telebot
 from telebot import types
 
-from get_text_from_db import get_text
-from log import add_log
-from parsers import parse_date_and_time, tehran_tz, english_to_persian
+from get_text_from_db import RenderCache, get_text, to_str
+from jalali import format_jalali, utc_to_tehran
+from log import add_log, handler as log_handler
+from metrics import metrics, serve_metrics
+from parsers import parse_cache, parse_date_and_time, tehran_tz, english_to_persian
+from rollups import INSTRUMENT_ALIASES, downsample, resolve_instrument
+from scheduler import BUSY, RATE_LIMITED, ChatScheduler
 from secret import *
+from single_flight import SingleFlight
+from timestamp_index import TimestampIndex
 
 bot = telebot.TeleBot(TELEGRAM_BOT_TOKEN)
 
 from datetime import timedelta, timezone
-from pymongo import ASCENDING, MongoClient
+from pymongo import ASCENDING, DESCENDING, MongoClient
 
 mongo_client = MongoClient("mongodb://localhost:27017/")
 db = mongo_client["bazarbin_data"]
 collection = db["prices"]
-
-
-# ===== TELEGRAM BOT HANDLERS =====
-@bot.message_handler(commands=["start"])
-def send_welcome(message):
-    welcome_text = """
+rollups = db["rollups"]
+timestamp_index = TimestampIndex(collection, INDEX_REFRESH_SECONDS)
+render_cache = RenderCache(RENDER_CACHE_SIZE)
+snapshot_lookups = SingleFlight()
+snapshot_renders = SingleFlight()
+scheduler = ChatScheduler(HANDLER_WORKERS, HANDLER_QUEUE_SIZE, CHAT_RATE, CHAT_BURST)
+
+metrics.register("render_cache", render_cache.stats)
+metrics.register("parse_cache", parse_cache.stats)
+metrics.register("snapshot_lookups", snapshot_lookups.stats)
+metrics.register("snapshot_renders", snapshot_renders.stats)
+metrics.register("scheduler", scheduler.stats)
+metrics.register(
+    "log",
+    lambda: {
+        "sent": log_handler.sent,
+        "spilled": log_handler.spilled,
+        "dropped": log_handler.dropped,
+    },
+)
+metrics.register(
+    "timestamp_index",
+    lambda: {"size": len(timestamp_index), "ready": int(timestamp_index.ready)},
+)
+
+# Enough to decide between forwarding the channel post and rendering it;
+# ``updated`` is set by edits and keys the render cache
+LEAN_FIELDS = {"timestamp": 1, "message_id": 1, "updated": 1}
+
+WELCOME_TEXT = """
 ..:: بات بازاربین ::..
 
 با ارسال یک تاریخ یا ساعت، اطلاعات بازار در آن زمان را دریافت کنید.
@@ -32,12 +60,8 @@ def send_welcome(message):
 راهنمای وارد کردن تاریخ و ساعت (فرمت های قابل قبول):
 /input_help
     """
-    bot.reply_to(message, welcome_text)
 
-
-@bot.message_handler(commands=["input_help"])
-def input_help_handler(message):
-    help_message = """..::  راهنمای وارد کردن تاریخ و ساعت  ::..
+HELP_TEXT = """..::  راهنمای وارد کردن تاریخ و ساعت  ::..
 
 - تاریخ شمسی و میلادی در فرمت های مختلف قابل قبول است.
 
@@ -67,121 +91,383 @@ def input_help_handler(message):
 
 - فقط اطلاعات بعد از ۱۴۰۲/۰۱/۱۸ یا ۲۰۲۳/۰۴/۰۷ در دسترس هستند.
 """
-    bot.send_message(message.chat.id, help_message, parse_mode="HTML")
+
+FUTURE_TEXT = "پیشبینی اطلاعات بازار در آینده از عهده ما خارج است 🗿"
+NOT_FOUND_TEXT = "📭 پیامی یافت نشد."
+BUSY_TEXT = "⏳ ربات در حال حاضر مشغول است، لطفا چند لحظه دیگر دوباره تلاش کنید."
+RATE_LIMITED_TEXT = "⏳ تعداد درخواست‌های شما زیاد است، لطفا کمی صبر کنید."
+RANGE_HINT = (
+    "راهنمای بازه: /range <از> <تا> [نماد]\n"
+    "مثال: /range 1404/08/01 1404/08/10 usd\n"
+    "اگر تاریخ ساعت هم دارد، دو سر بازه را با , جدا کنید:\n"
+    "/range 1404/08/01 12:00, -2h, btc\n"
+    f"نمادها: {', '.join(INSTRUMENT_ALIASES)}"
+)
+BOT_COMMANDS = [
+    types.BotCommand(command="/start", description="شروع"),
+    types.BotCommand(
+        command="/input_help", description="راهنمای وارد کردن تاریخ و ساعت"
+    ),
+    types.BotCommand(command="/range", description="خلاصه قیمت در یک بازه زمانی"),
+]
+INPUT_HELP_HINT = "راهنمای وارد کردن تاریخ و ساعت (فرمت های قابل قبول):\n/input_help"
+
+
+# ===== TELEGRAM BOT HANDLERS =====
+@bot.message_handler(commands=["start"])
+def send_welcome(message):
+    bot.reply_to(message, WELCOME_TEXT)
+
+
+@bot.message_handler(commands=["input_help"])
+def input_help_handler(message):
+    bot.send_message(message.chat.id, HELP_TEXT, parse_mode="HTML")
+
+
+# Non-admins fall through to the date handler like any unknown text
+@bot.message_handler(
+    commands=["stats"], func=lambda message: message.from_user.id in ADMIN_IDS
+)
+def stats_handler(message):
+    bot.send_message(
+        message.chat.id, f"```\n{metrics.report()}\n```", parse_mode="Markdown"
+    )
+
+
+@bot.message_handler(commands=["range"])
+def range_handler(message):
+    schedule(message, answer_range)
 
 
 @bot.message_handler(func=lambda message: True)
 def handle_date_input(message):
-    chat_id = message.chat.id
+    schedule(message, answer_date_input)
+
+
+def schedule(message, func):
+    rejected = scheduler.submit(message.chat.id, func, message)
+    if rejected == BUSY:
+        bot.reply_to(message, BUSY_TEXT)
+    elif rejected == RATE_LIMITED and scheduler.should_warn(message.chat.id):
+        bot.reply_to(message, RATE_LIMITED_TEXT)
+
+
+def answer_range(message):
+    metrics.inc("range_requests")
     try:
-        result = parse_date_and_time(message.text)
+        with metrics.timer("range"):
+            txt = range_text(message.text)
+        if txt:
+            bot.send_message(message.chat.id, txt, parse_mode="Markdown")
+        else:
+            bot.reply_to(message, NOT_FOUND_TEXT)
+    except ValueError as e:
+        metrics.inc("invalid_input")
+        bot.reply_to(message, f"{str(e)}\n{RANGE_HINT}")
+    except Exception as e:
+        metrics.inc("errors")
+        error = f"❌ مشکلی پیش آمده:\n{str(e)}"
+        bot.reply_to(message, error)
+        add_log(error)
+
+
+def answer_date_input(message):
+    with metrics.timer("total"):
+        _answer_date_input(message)
 
-        gregorian_day = str(result)[:10]
-        jalali_day = convert_to_jalali(str(result))
-        input_time = str(result)[11:16]
+
+def _answer_date_input(message):
+    chat_id = message.chat.id
+    metrics.inc("requests")
+    try:
+        with metrics.timer("parse"):
+            result = parse_date_and_time(message.text)
 
         if result > dt.now(tehran_tz):
-            txt = "پیشبینی اطلاعات بازار در آینده از عهده ما خارج است 🗿"
-            bot.reply_to(message, txt)
+            metrics.inc("future")
+            bot.reply_to(message, FUTURE_TEXT)
             return
         else:
-            greg = english_to_persian(gregorian_day).replace("-", "/")
-            shamsi = english_to_persian(jalali_day).replace("-", "/")
-            txt = f"✅ ساعت و تاریخ دریافت شدند.\nمیلادی: {greg}\nشمسی: {shamsi}\nساعت: {english_to_persian(input_time)}\n🔍 در تلاش برای یافتن اطلاعات بازار در تاریخ و ساعت مورد نظر هستیم ..."
-            bot.reply_to(message, txt)
+            with metrics.timer("reply"):
+                bot.reply_to(message, received_text(result))
 
         # Get the closest message for that datetime
-        msg = get_nearest_data(result)
+        with metrics.timer("lookup"):
+            msg = find_snapshot(result)
+
+        notice = distance_notice(msg, result)
+        if notice:
+            bot.reply_to(message, notice)
 
         if msg and "message_id" in msg:
             try:
                 msg_id = int(msg["message_id"])
-                bot.forward_message(chat_id, f"@{CHANNEL_USERNAME}", msg_id)
+                with metrics.timer("forward"):
+                    bot.forward_message(chat_id, f"@{CHANNEL_USERNAME}", msg_id)
+                metrics.inc("forwarded")
             except Exception as e:
-                txt = get_text(msg)
-                utc_dt = pytz.utc.localize(msg["timestamp"])
-                tehran_dt = utc_dt.astimezone(tehran_tz)
-                txt += f"\n\n{to_jalali(tehran_dt)}"
-                bot.send_message(
-                    chat_id,
-                    txt,
-                    parse_mode="Markdown",
-                    disable_web_page_preview=True,
-                )
+                metrics.inc("forward_fallbacks")
+                send_rendered(chat_id, msg)
         elif msg:
-            txt = get_text(msg)
-            utc_dt = pytz.utc.localize(msg["timestamp"])
-            tehran_dt = utc_dt.astimezone(tehran_tz)
-            txt += f"\n\n{to_jalali(tehran_dt)}"
-            bot.send_message(
-                chat_id,
-                txt,
-                parse_mode="Markdown",
-                disable_web_page_preview=True,
-            )
+            send_rendered(chat_id, msg)
         else:
-            txt = "📭 پیامی یافت نشد."
-            bot.reply_to(message, txt)
+            metrics.inc("not_found")
+            bot.reply_to(message, NOT_FOUND_TEXT)
     except ValueError as e:
-        err = f"{str(e)}\nراهنمای وارد کردن تاریخ و ساعت (فرمت های قابل قبول):\n/input_help"
+        metrics.inc("invalid_input")
+        err = f"{str(e)}\n{INPUT_HELP_HINT}"
         bot.reply_to(message, err)
         add_log(
             f"ValueError in parse_date_and_time:\nMessage Text: {message.text}\n{str(e)}"
         )
     except Exception as e:
+        metrics.inc("errors")
         error = f"❌ مشکلی پیش آمده:\n{str(e)}"
         bot.reply_to(message, error)
         add_log(error)
 
 
-def get_nearest_data(dt_object: dt):
-    dt_object = dt_object.astimezone(timezone.utc)
+def send_rendered(chat_id, msg):
+    with metrics.timer("render"):
+        txt = render_snapshot(msg["_id"], msg.get("updated"))
+    with metrics.timer("send"):
+        bot.send_message(
+            chat_id,
+            txt,
+            parse_mode="Markdown",
+            disable_web_page_preview=True,
+        )
+    metrics.inc("rendered")
+
 
-    start = dt_object - timedelta(minutes=2, seconds=30)
-    end = dt_object + timedelta(minutes=2, seconds=30)
+def get_nearest_data(
+    dt_object: dt, max_distance: timedelta | None = None, projection=None
+):
+    """
+    Return the snapshot closest to ``dt_object`` on either side, or None when
+    there is none within ``max_distance`` (unbounded by default).
+    ``projection`` limits the fields read; ``timestamp`` is always needed.
+    """
+    dt_object = dt_object.astimezone(timezone.utc)
 
-    cursor = collection.find({"timestamp": {"$gte": start, "$lte": end}}).sort(
-        "timestamp", ASCENDING
+    if timestamp_index.ready:
+        entry = timestamp_index.nearest(dt_object, max_distance=max_distance)
+        if entry is None:
+            return None
+        doc = collection.find_one({"_id": entry[0]}, projection)
+        if doc is None:
+            # Deleted since the index saw it
+            timestamp_index.discard(entry[0])
+            return get_nearest_data(dt_object, max_distance, projection)
+        return doc
+
+    # Two point queries on the timestamp index, one document each
+    before = collection.find_one(
+        {"timestamp": {"$lte": dt_object}},
+        projection,
+        sort=[("timestamp", DESCENDING)],
     )
+    after = collection.find_one(
+        {"timestamp": {"$gte": dt_object}},
+        projection,
+        sort=[("timestamp", ASCENDING)],
+    )
+    candidates = [doc for doc in (before, after) if doc]
+    if not candidates:
+        return None
 
-    docs = list(cursor)
-    if not docs:
+    nearest_doc = min(candidates, key=lambda doc: snapshot_distance(doc, dt_object))
+    if (
+        max_distance is not None
+        and snapshot_distance(nearest_doc, dt_object) > max_distance
+    ):
         return None
+    return nearest_doc
+
+
+def get_nearest_many(
+    dt_objects, max_distance: timedelta | None = None, projection=None
+):
+    """
+    ``get_nearest_data`` for many instants, e.g. the results of
+    ``parse_many``. Returns a list parallel to ``dt_objects``; None entries
+    in the input stay None. With the timestamp index warm, all snapshots
+    are read in a single ``$in`` query.
+    """
+    if not timestamp_index.ready:
+        return [
+            get_nearest_data(d, max_distance, projection) if d else None
+            for d in dt_objects
+        ]
+
+    entries = [
+        timestamp_index.nearest(d, max_distance=max_distance) if d else None
+        for d in dt_objects
+    ]
+    ids = list({entry[0] for entry in entries if entry})
+    docs = {
+        doc["_id"]: doc for doc in collection.find({"_id": {"$in": ids}}, projection)
+    }
+
+    found = []
+    for d, entry in zip(dt_objects, entries):
+        if entry is None:
+            found.append(None)
+        elif entry[0] in docs:
+            found.append(docs[entry[0]])
+        else:
+            # Deleted since the index saw it
+            timestamp_index.discard(entry[0])
+            found.append(get_nearest_data(d, max_distance, projection))
+    return found
+
 
-    nearest_doc = min(
-        docs,
-        key=lambda doc: abs(doc["timestamp"].replace(tzinfo=timezone.utc) - dt_object),
+def parse_range_args(text: str):
+    """
+    Split ``/range <from> <to> [instrument]``. Ends that contain a time
+    have spaces of their own, so a comma-separated form is accepted too.
+    """
+    command_and_args = text.split(maxsplit=1)
+    args = command_and_args[1] if len(command_and_args) > 1 else ""
+    parts = [p.strip() for p in args.split(",")] if "," in args else args.split()
+    if len(parts) not in (2, 3) or not all(parts):
+        raise ValueError("❌ فرمت بازه معتبر نیست.")
+    instrument = resolve_instrument(parts[2] if len(parts) == 3 else "usd")
+    if instrument is None:
+        raise ValueError("❌ نماد معتبر نیست.")
+    start, end = parse_date_and_time(parts[0]), parse_date_and_time(parts[1])
+    if start > end:
+        start, end = end, start
+    end = min(end, dt.now(tehran_tz))
+    if start >= end:
+        raise ValueError("❌ فرمت بازه معتبر نیست.")
+    return start, end, instrument
+
+
+def range_text(text: str) -> str | None:
+    start, end, instrument = parse_range_args(text)
+    lines = []
+    for row in downsample(rollups, instrument, start, end, RANGE_POINTS):
+        day = to_jalali(utc_to_tehran(row["start"]))
+        lines.append(
+            f"{day}  {to_str(row['open'])} {to_str(row['high'])} "
+            f"{to_str(row['low'])} {to_str(row['close'])}"
+        )
+    if not lines:
+        return None
+    header = (
+        f"`{instrument}`\n"
+        f"{to_jalali(start)} ← {to_jalali(end)}\n"
+        "زمان  باز  بیشترین  کمترین  پایانی"
     )
-    return nearest_doc
+    body = "\n".join(lines)
+    return f"{header}\n```\n{body}\n```"
+
+
+def received_text(result: dt) -> str:
+    gregorian_day = str(result)[:10]
+    jalali_day = convert_to_jalali(str(result))
+    input_time = str(result)[11:16]
+    greg = english_to_persian(gregorian_day).replace("-", "/")
+    shamsi = english_to_persian(jalali_day).replace("-", "/")
+    return f"✅ ساعت و تاریخ دریافت شدند.\nمیلادی: {greg}\nشمسی: {shamsi}\nساعت: {english_to_persian(input_time)}\n🔍 در تلاش برای یافتن اطلاعات بازار در تاریخ و ساعت مورد نظر هستیم ..."
+
+
+def distance_notice(msg, result: dt) -> str | None:
+    """Tell the user when the nearest snapshot is outside the usual window."""
+    if not msg:
+        return None
+    distance = snapshot_distance(msg, result)
+    if distance <= timedelta(minutes=2, seconds=30):
+        return None
+    side = "قبل" if msg["timestamp"].replace(tzinfo=timezone.utc) < result else "بعد"
+    return f"ℹ️ نزدیک‌ترین اطلاعات موجود {format_distance(distance)} {side} از زمان درخواستی است."
+
+
+def find_snapshot(result: dt):
+    """
+    Lean lookup of the snapshot nearest to ``result``. Concurrent requests
+    for the same minute share one database lookup, made for the instant of
+    the first of them; a request on its own looks up its exact instant.
+    """
+    minute = result.astimezone(timezone.utc).replace(second=0, microsecond=0)
+    return snapshot_lookups.do(minute, get_nearest_data, result, projection=LEAN_FIELDS)
+
+
+def render_snapshot(_id, updated=None) -> str:
+    """
+    Fetch the full price payload of a snapshot and render it for sending.
+    ``updated`` is the snapshot's edit time from the lean lookup, if any.
+    """
+    key = (_id, updated)
+    txt = render_cache.get(key)
+    if txt is not None:
+        return txt
+    return snapshot_renders.do(key, _render_snapshot, _id)
+
+
+def _render_snapshot(_id) -> str:
+    doc = collection.find_one({"_id": _id})
+    txt = get_text(doc)
+    txt += f"\n\n{to_jalali(utc_to_tehran(doc['timestamp']))}"
+    # Keyed on the version actually rendered, which may be newer
+    render_cache.put((_id, doc.get("updated")), txt)
+    return txt
+
+
+def snapshot_distance(doc, dt_object: dt) -> timedelta:
+    return abs(doc["timestamp"].replace(tzinfo=timezone.utc) - dt_object)
+
+
+def format_distance(delta: timedelta) -> str:
+    minutes = int(delta.total_seconds() // 60)
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    parts = []
+    if days:
+        parts.append(f"{days} روز")
+    if hours:
+        parts.append(f"{hours} ساعت")
+    if minutes or not parts:
+        parts.append(f"{minutes} دقیقه")
+    return english_to_persian(" و ".join(parts))
 
 
 def to_jalali(dt_object: dt) -> str:
-    jalali_date = jdatetime.datetime.fromgregorian(datetime=dt_object)
-    return jalali_date.strftime("%Y/%m/%d   %H:%M")
+    return format_jalali(dt_object)
 
 
 def convert_to_jalali(date_str):
     try:
-        gregorian_dt = dt.strptime(date_str[:10], "%Y-%m-%d")
-        jd = jdatetime.date.fromgregorian(date=gregorian_dt)
-        return jd.strftime("%Y-%m-%d")
+        gregorian_dt = dt.fromisoformat(date_str[:10])
+        return format_jalali(gregorian_dt, with_time=False, sep="-")
     except ValueError as e:
         error = f"Exception in convert_to_jalali:\n{e}"
         add_log(error)
         return None
 
 
-if __name__ == "__main__":
+def prepare(register_commands=True):
+    """Startup shared by every serving mode."""
     if PROXY_SERVER and PROXY_PORT:
         proxy_url = f"socks5h://{PROXY_SERVER}:{PROXY_PORT}"
         telebot.apihelper.proxy = {"http": proxy_url, "https": proxy_url}
-    commands = [
-        types.BotCommand(command="/start", description="شروع"),
-        types.BotCommand(
-            command="/input_help", description="راهنمای وارد کردن تاریخ و ساعت"
-        ),
-    ]
-    bot.set_my_commands(commands)
+    if BOT_API_URL:
+        # A local Bot API server, or the fake one of modify/load_test_webhook.py
+        telebot.apihelper.API_URL = BOT_API_URL
+    if register_commands:
+        bot.set_my_commands(BOT_COMMANDS)
+    collection.create_index([("timestamp", ASCENDING)])
+    timestamp_index.start()
+    print(f"Timestamp index warmed with {len(timestamp_index)} snapshots")
+    scheduler.start()
+    if METRICS_PORT:
+        serve_metrics(METRICS_HOST, METRICS_PORT)
+        print(f"Metrics on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+
+if __name__ == "__main__":
+    prepare()
     print("Bot is Polling ...")
     add_log(f"Bot Started at {dt.now(tehran_tz).strftime('%Y-%m-%d %H:%M:%S')}")
     bot.polling()
@@ -0,0 +1,183 @@
+"""
+In-process counters and per-stage latency histograms.
+
+Handlers time their stages with ``metrics.timer("lookup")`` and count
+outcomes with ``metrics.inc("forwarded")``. Components that keep their own
+numbers (caches, scheduler, singleflight) are registered with
+``metrics.register`` and read when a report is built. Reports are served
+by the admin ``/stats`` command and, when METRICS_PORT is set, as
+Prometheus text on http://METRICS_HOST:METRICS_PORT/metrics.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in milliseconds; the last bucket is +Inf
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    def __init__(self, bounds=BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.sum += ms
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.sources = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds * 1000)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def register(self, name, stats):
+        """``stats`` is a callable returning a dict of numbers."""
+        self.sources[name] = stats
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+            stages = {
+                stage: {
+                    "count": h.count,
+                    "sum_ms": h.sum,
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                    "p99": h.quantile(0.99),
+                    "buckets": list(zip(h.bounds, h.counts)),
+                    "overflow": h.counts[-1],
+                }
+                for stage, h in self.histograms.items()
+            }
+        sources = {}
+        for name, stats in self.sources.items():
+            try:
+                sources[name] = stats()
+            except Exception as e:
+                print(f"Exception in Metrics.snapshot ({name}): {e}")
+        return {
+            "uptime": time.time() - self.started,
+            "counters": counters,
+            "stages": stages,
+            "sources": sources,
+        }
+
+    def report(self):
+        """Plain-text summary for the /stats command."""
+        snap = self.snapshot()
+        hours, rest = divmod(int(snap["uptime"]), 3600)
+        lines = [
+            f"uptime {hours}h{rest // 60:02d}m",
+            "",
+            "stage      n    p50   p95   p99 ms",
+        ]
+        for stage, s in sorted(snap["stages"].items()):
+            lines.append(
+                f"{stage:9s}{s['count']:5d}{s['p50']:7g}{s['p95']:6g}{s['p99']:6g}"
+            )
+        lines.append("")
+        counters = snap["counters"]
+        requests = counters.get("requests", 0)
+        for name, value in sorted(counters.items()):
+            lines.append(f"{name} {value}")
+        if requests:
+            failed = counters.get("errors", 0) + counters.get("invalid_input", 0)
+            lines.append(f"error_rate {failed / requests:.1%}")
+        for name, stats in snap["sources"].items():
+            lines.append("")
+            lines.append(name)
+            for key, value in stats.items():
+                value = f"{value:.1%}" if isinstance(value, float) else value
+                lines.append(f"  {key} {value}")
+        return "\n".join(lines)
+
+    def prometheus(self, prefix="bazarbin"):
+        snap = self.snapshot()
+        lines = [f"{prefix}_uptime_seconds {snap['uptime']:.0f}"]
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        metric = f"{prefix}_stage_duration_milliseconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for stage, s in sorted(snap["stages"].items()):
+            cumulative = 0
+            for bound, n in s["buckets"]:
+                cumulative += n
+                lines.append(
+                    f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {s["count"]}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {s["sum_ms"]:.3f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {s["count"]}')
+        for name, stats in snap["sources"].items():
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"{prefix}_{name}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(host, port):
+    """Serve /metrics from a daemon thread; meant for localhost scraping."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
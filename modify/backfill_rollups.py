@@ -0,0 +1,26 @@
+"""
+Rebuild the OHLC rollups from the prices collection.
+
+    python backfill_rollups.py              # everything
+    python backfill_rollups.py 1404/08/01   # from that week on (any bot date format)
+"""
+
+import sys
+import time
+
+from pymongo import MongoClient
+
+from parsers import parse_date_and_time
+from rollups import ensure_indexes, rebuild_rollups
+
+mongo_client = MongoClient("mongodb://localhost:27017/")
+db = mongo_client["bazarbin_data"]
+collection = db["prices"]
+rollups = db["rollups"]
+
+if __name__ == "__main__":
+    since = parse_date_and_time(sys.argv[1]) if len(sys.argv) > 1 else None
+    ensure_indexes(rollups)
+    start = time.perf_counter()
+    count = rebuild_rollups(collection, rollups, since)
+    print(f"Rolled up {count} snapshots in {time.perf_counter() - start:.1f}s")
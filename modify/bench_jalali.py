@@ -0,0 +1,117 @@
+"""
+Compare the table-driven calendar and Tehran time helpers in ``jalali`` with
+the ``jdatetime`` / ``pytz`` calls they replace.
+
+    python bench_jalali.py
+
+Every pair is checked for identical output over the whole table range before
+it is timed.
+"""
+
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import jdatetime
+import pytz
+
+from jalali import (
+    format_jalali,
+    gregorian_to_jalali,
+    jalali_to_gregorian,
+    localize_tehran,
+    tehran_tz,
+    utc_to_tehran,
+)
+
+ROUNDS = 100000
+
+
+def old_jalali_to_gregorian(year, month, day):
+    return jdatetime.date(year, month, day).togregorian()
+
+
+def old_format_jalali(dt_object):
+    return jdatetime.datetime.fromgregorian(datetime=dt_object).strftime(
+        "%Y/%m/%d   %H:%M"
+    )
+
+
+def old_utc_to_tehran(dt_object):
+    return pytz.utc.localize(dt_object).astimezone(tehran_tz)
+
+
+def samples():
+    rng = random.Random(1404)
+    instants = [
+        datetime(2023, 4, 7) + timedelta(minutes=rng.randrange(4_000_000))
+        for _ in range(1000)
+    ]
+    days = [d.date() for d in instants]
+    jalali_days = [jdatetime.date.fromgregorian(date=d) for d in days]
+    return instants, days, [(d.year, d.month, d.day) for d in jalali_days]
+
+
+def check():
+    day = date(2015, 1, 1)
+    while day < date(2046, 1, 1):
+        jd = jdatetime.date.fromgregorian(date=day)
+        assert gregorian_to_jalali(day) == (jd.year, jd.month, jd.day), day
+        assert jalali_to_gregorian(jd.year, jd.month, jd.day) == day, day
+        day += timedelta(days=1)
+    instant = datetime(2021, 1, 1)
+    while instant < datetime(2030, 1, 1):
+        assert str(utc_to_tehran(instant)) == str(old_utc_to_tehran(instant))
+        assert str(localize_tehran(instant)) == str(tehran_tz.localize(instant))
+        assert format_jalali(instant) == old_format_jalali(instant)
+        instant += timedelta(hours=5, minutes=7)
+
+
+def timed(func, args):
+    n = len(args)
+    start = time.perf_counter()
+    for i in range(ROUNDS):
+        func(*args[i % n])
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def main():
+    check()
+    instants, days, jalali_days = samples()
+    local = [(d.replace(tzinfo=None),) for d in map(old_utc_to_tehran, instants)]
+    pairs = [
+        (
+            "jalali -> gregorian",
+            old_jalali_to_gregorian,
+            jalali_to_gregorian,
+            jalali_days,
+        ),
+        (
+            "gregorian -> jalali",
+            lambda d: jdatetime.date.fromgregorian(date=d),
+            gregorian_to_jalali,
+            [(d,) for d in days],
+        ),
+        ("format datetime", old_format_jalali, format_jalali, local),
+        (
+            "utc -> tehran",
+            old_utc_to_tehran,
+            utc_to_tehran,
+            [(d,) for d in instants],
+        ),
+        ("localize tehran", tehran_tz.localize, localize_tehran, local),
+        (
+            "aware -> tehran",
+            lambda d: d.astimezone(tehran_tz),
+            utc_to_tehran,
+            [(d.replace(tzinfo=timezone.utc),) for d in instants],
+        ),
+    ]
+    print(f"{'':22s}{'old us':>9s}{'new us':>9s}{'speedup':>9s}")
+    for label, old, new, args in pairs:
+        old_us, new_us = timed(old, args), timed(new, args)
+        print(f"{label:22s}{old_us:9.2f}{new_us:9.2f}{old_us / new_us:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
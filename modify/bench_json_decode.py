@@ -0,0 +1,118 @@
+"""
+Compare ``decode_json_post`` (json first, literal_eval fallback) with the
+plain ``ast.literal_eval`` the JSON scraper used to run on every post.
+
+    python bench_json_decode.py
+
+The corpus is synthetic: posts shaped like the USD / USDT / GOLD /
+Cryptocurrency payloads ``get_json_data`` consumes, serialised both as JSON
+and as the Python dict repr of legacy posts. Every post is checked to decode
+to the same dict either way before it is timed.
+"""
+
+import ast
+import json
+import random
+import time
+
+from db_data import (
+    decode_json_post,
+    get_json_data,
+    json_coin_dict,
+    json_gold_dict,
+    json_usd_dict,
+    parse_json_text,
+)
+
+POSTS = 500
+ROUNDS = 20000
+USDT_SOURCES = ["Nobitex_150", "Nobitex_5000", "Wallex", "Bitpin", "Ramzinex"]
+
+
+def toman(rng, low, high):
+    return f"{rng.randrange(low, high):,}"
+
+
+def payload(rng):
+    usd = {
+        k: {
+            "buy": toman(rng, 90_000, 110_000),
+            "sell": "خطا" if rng.random() < 0.05 else toman(rng, 90_000, 110_000),
+        }
+        for k in json_usd_dict
+    }
+    return {
+        "USD": usd,
+        "USDT": {
+            k: {"buy": toman(rng, 90_000, 110_000), "sell": toman(rng, 90_000, 110_000)}
+            for k in USDT_SOURCES
+        },
+        "GOLD": {
+            k: (
+                {"price": f"${rng.uniform(2000, 3000):.2f}"}
+                if k == "اونس طلا"
+                else {"price": toman(rng, 5_000_000, 90_000_000)}
+            )
+            for k in json_gold_dict
+        },
+        "Cryptocurrency": {
+            k: {"price": f"{rng.uniform(0.1, 100_000):.2f}"} for k in json_coin_dict
+        },
+    }
+
+
+def corpus():
+    rng = random.Random(1404)
+    data = [payload(rng) for _ in range(POSTS)]
+    return (
+        data,
+        [json.dumps(d, ensure_ascii=False, indent=rng.choice([None, 2])) for d in data],
+        [repr(d) for d in data],
+    )
+
+
+def check(data, json_posts, legacy_posts):
+    for d, as_json, legacy in zip(data, json_posts, legacy_posts):
+        assert decode_json_post(as_json) == d
+        assert decode_json_post(legacy) == d
+        assert ast.literal_eval(as_json) == d
+        assert parse_json_text(as_json) == get_json_data(d)
+    for broken in ("{", "{'a': __import__('os')}", '{"USD": [}'):
+        try:
+            decode_json_post(broken)
+        except (ValueError, SyntaxError):
+            pass
+        else:
+            raise AssertionError(broken)
+
+
+def timed(func, posts):
+    n = len(posts)
+    start = time.perf_counter()
+    for i in range(ROUNDS):
+        func(posts[i % n])
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def old_parse_json_text(text):
+    return get_json_data(ast.literal_eval(text))
+
+
+def main():
+    data, json_posts, legacy_posts = corpus()
+    check(data, json_posts, legacy_posts)
+    size = sum(map(len, json_posts)) / len(json_posts)
+    print(f"{POSTS} posts, {size:.0f} chars on average\n")
+    pairs = [
+        ("decode json post", ast.literal_eval, decode_json_post, json_posts),
+        ("decode legacy post", ast.literal_eval, decode_json_post, legacy_posts),
+        ("parse json post", old_parse_json_text, parse_json_text, json_posts),
+    ]
+    print(f"{'':22s}{'old us':>9s}{'new us':>9s}{'speedup':>9s}")
+    for label, old, new, posts in pairs:
+        old_us, new_us = timed(old, posts), timed(new, posts)
+        print(f"{label:22s}{old_us:9.2f}{new_us:9.2f}{old_us / new_us:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Micro-benchmark of the date/time parsers over the test_parsers.py corpus and
+a generated fuzz corpus (valid, invalid and ambiguous inputs, Latin and
+Persian digits).
+
+    python bench_parsers.py --save baseline.json      # on the old commit
+    python bench_parsers.py --compare baseline.json   # on the new one
+
+Relative inputs are resolved against a frozen clock and the fuzz corpus is
+seeded, so runs are reproducible offline. Each function reports ops/sec and
+the peak memory one call allocates (tracemalloc); the best of
+``--repeat`` timed runs is kept to damp machine noise. ``--compare`` exits with
+status 1 when any function got slower than ``--tolerance``.
+"""
+
+import argparse
+import ast
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+import parsers
+from parsers import (
+    english_to_persian,
+    get_date,
+    get_time,
+    parse_date,
+    parse_date_and_time,
+    parse_hour_minute,
+    parse_relative_date,
+    parse_time,
+    tehran_tz,
+)
+
+NOW = tehran_tz.localize(datetime(2025, 11, 10, 12, 34))
+CORPUS_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "test_parsers.py"
+)
+
+
+def load_corpus():
+    """The literal input lists of test_parsers.py, without running it."""
+    with open(CORPUS_FILE, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    lists = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.List):
+            try:
+                lists[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                pass
+    return lists
+
+
+def fuzz_corpus(rng, count):
+    """Random date, time and relative tokens, each also in Persian digits."""
+    dates, times, relative_dates, relative_times, clocks = [], [], [], [], []
+    for _ in range(count):
+        year = rng.choice([1390, 1399, 1402, 1404, 1425, 2020, 2025, 2050])
+        month, day = rng.randint(0, 13), rng.randint(0, 32)
+        sep = rng.choice(["/", "-", " ", ""])
+        dates.append(f"{year}{sep}{month}{sep}{day}")
+        dates.append(f"{year}{sep}{month:02d}{sep}{day:02d}")
+
+        hour, minute = rng.randint(0, 25), rng.randint(0, 61)
+        sep = rng.choice([":", " ", ""])
+        times.append(f"{hour}{sep}{minute}")
+        times.append(f"{hour:02d}{sep}{minute:02d}")
+
+        units = rng.sample("YMWD", rng.randint(1, 4))
+        relative_dates.append(
+            "".join(f"{rng.choice('-+')}{rng.randint(0, 40)}{u}" for u in units)
+        )
+        units = rng.sample("hm", rng.randint(1, 2))
+        relative_times.append(
+            rng.choice(["", " "]).join(
+                f"{rng.choice('-+')}{rng.randint(0, 90)}{u}" for u in units
+            )
+        )
+        clocks.append(str(rng.randint(0, 2500)))
+    # Inputs users get wrong: stray letters, signs and separators
+    junk = ["abc", "12:3a", "1404//08", "--2h", "-h", "1404/08", "+", "۱۲::۳۵"]
+    dates += junk
+    times += junk
+    relative_dates += ["-Y", "-1Y-", "--1D", "1Y+-2M", "-1Q"]
+    relative_times += ["-h", "-2h-", "--2h", "2h+-3m", "-2x"]
+    corpus = {
+        "dates": dates,
+        "times": times,
+        "relative_dates": relative_dates,
+        "relative_times": relative_times,
+        "clocks": clocks,
+    }
+    return {
+        name: inputs + [english_to_persian(s) for s in inputs]
+        for name, inputs in corpus.items()
+    }
+
+
+def build_cases(seed, fuzz_count):
+    lists = load_corpus()
+    fuzz = fuzz_corpus(random.Random(seed), fuzz_count)
+    corpus_dates = lists["date_parts1"] + lists["date_parts2"]
+    corpus_relative = [s for s in corpus_dates if parsers.RELATIVE_DATE_UNIT.search(s)]
+    full = list(corpus_dates)
+    for date in lists["date_parts2"]:
+        full += [f"{date} {t}" for t in lists["time_parts"]]
+    full += [f"{d} {t}" for d, t in zip(fuzz["dates"], fuzz["times"])]
+    full += fuzz["relative_times"]
+
+    def uncached(s):
+        return parse_date_and_time(s, now=NOW)
+
+    return {
+        "parse_date": (lambda s: parse_date(s, now=NOW), corpus_dates + fuzz["dates"]),
+        "parse_time": (
+            lambda s: parse_time(s, now=NOW),
+            lists["time_parts"] + fuzz["times"] + fuzz["relative_times"],
+        ),
+        "parse_relative_date": (
+            lambda s: parse_relative_date(s, now=NOW),
+            corpus_relative + fuzz["relative_dates"],
+        ),
+        "get_date": (get_date, corpus_relative + fuzz["relative_dates"]),
+        "get_time": (get_time, fuzz["relative_times"]),
+        "parse_hour_minute": (parse_hour_minute, fuzz["clocks"]),
+        "parse_date_and_time": (uncached, full),
+    }
+
+
+def measure(func, inputs, min_seconds, repeat=5):
+    errors = 0
+    for s in inputs:
+        try:
+            func(s)
+        except ValueError:
+            errors += 1
+
+    # Best of several timed runs; the slower ones measure the machine
+    best = 0
+    for _ in range(repeat):
+        ops = 0
+        start = time.perf_counter()
+        while True:
+            for s in inputs:
+                try:
+                    func(s)
+                except ValueError:
+                    pass
+            ops += len(inputs)
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                break
+        best = max(best, ops / elapsed)
+
+    tracemalloc.start()
+    peak = 0
+    for s in inputs:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            func(s)
+        except ValueError:
+            pass
+        peak += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    return {
+        "inputs": len(inputs),
+        "errors": errors,
+        "ops_per_sec": round(best),
+        "peak_bytes_per_op": round(peak / len(inputs)),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(CORPUS_FILE),
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"\n{'':22s}{'baseline':>12s}{'now':>12s}{'change':>9s}")
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        change = result["ops_per_sec"] / old["ops_per_sec"] - 1
+        flag = ""
+        if change < -tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:22s}{old['ops_per_sec']:12d}{result['ops_per_sec']:12d}"
+            f"{change:+9.1%}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=1404)
+    parser.add_argument("--fuzz", type=int, default=500, help="fuzz inputs per kind")
+    parser.add_argument("--seconds", type=float, default=0.2, help="per run")
+    parser.add_argument("--repeat", type=int, default=5, help="runs, best counts")
+    parser.add_argument("--only", nargs="*", help="functions to run")
+    parser.add_argument("--save", metavar="JSON")
+    parser.add_argument("--compare", metavar="JSON")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    # Every call should do the full parse, not hit the absolute-input cache
+    parsers.parse_cache.maxsize = 0
+
+    cases = build_cases(args.seed, args.fuzz)
+    results = {}
+    print(f"{'':22s}{'inputs':>8s}{'errors':>8s}{'ops/sec':>12s}{'B/op':>8s}")
+    for name, (func, inputs) in cases.items():
+        if args.only and name not in args.only:
+            continue
+        result = results[name] = measure(func, inputs, args.seconds, args.repeat)
+        print(
+            f"{name:22s}{result['inputs']:8d}{result['errors']:8d}"
+            f"{result['ops_per_sec']:12d}{result['peak_bytes_per_op']:8d}"
+        )
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "fuzz": args.fuzz,
+        "repeat": args.repeat,
+        "now": NOW.isoformat(),
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if (baseline["seed"], baseline["fuzz"]) != (args.seed, args.fuzz):
+            print("\nWarning: baseline was recorded with a different corpus")
+        if compare(results, baseline, args.tolerance):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
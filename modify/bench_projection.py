@@ -0,0 +1,109 @@
+"""
+Compare the bot's lean first-stage read (timestamp + message_id) with a full
+snapshot read.
+
+    python bench_projection.py                 # BSON encode/decode only
+    python bench_projection.py mongodb://localhost:27017/
+
+Without an argument the wire format is measured in-process with ``bson``,
+which is what the server sends and pymongo decodes. With a URI the same
+documents are written to a scratch ``bazarbin_bench`` database and read back
+through ``find_one`` both ways.
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import bson
+
+from db_data import get_data_dict
+
+LEAN_FIELDS = {"timestamp": 1, "message_id": 1}
+ROUNDS = 20000
+
+
+def sample_doc(i=0):
+    doc = get_data_dict()
+    usd = {"buy": 1_050_000 + i, "sell": 1_052_000 + i}
+    doc["currency_rates"]["usd"] = {
+        "sedaghat": dict(usd),
+        "sabze": dict(usd),
+        "tehran": dict(usd),
+        "fardayie": {"sabze": dict(usd), "tehran": dict(usd)},
+        "naghdi": {"sabze": dict(usd), "tehran": dict(usd)},
+        "bonbast": dict(usd),
+        "tgju": {"price": 1_051_000 + i},
+    }
+    for name in doc["currency_rates"]["usdt"]:
+        doc["currency_rates"]["usdt"][name] = {"ask": 106_500 + i, "bid": 106_300 + i}
+    doc["gold_prices"]["tala.ir"] = {
+        "ounce": {"price": 3990.5},
+        "tehran_market_price": {"price": 46_000_000},
+        "18_karat_gold": {"price": 10_600_000},
+        "old_coin": {"price": 105_000_000},
+        "new_coin": {"price": 110_000_000},
+        "quarter_coin": {"price": 30_000_000},
+    }
+    doc["crypto"]["eth_gas"] = [0.5, 0.6, 0.7]
+    for coin, price in (("btc", 108_000.1), ("eth", 3_900.2), ("bnb", 1_100.3)):
+        doc["crypto"][coin] = {"price": price}
+    doc["message_id"] = f"{100000 + i}"
+    doc["timestamp"] = datetime(2025, 11, 10, tzinfo=timezone.utc) + timedelta(
+        minutes=i
+    )
+    doc["_id"] = bson.ObjectId()
+    return doc
+
+
+def lean(doc):
+    return {k: v for k, v in doc.items() if k == "_id" or k in LEAN_FIELDS}
+
+
+def time_decode(raw):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        bson.decode(raw)
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def bench_bson():
+    doc = sample_doc()
+    full_raw, lean_raw = bson.encode(doc), bson.encode(lean(doc))
+    full_us, lean_us = time_decode(full_raw), time_decode(lean_raw)
+    print("BSON (per document)")
+    print(f"  full: {len(full_raw):5d} bytes  {full_us:7.2f} us decode")
+    print(f"  lean: {len(lean_raw):5d} bytes  {lean_us:7.2f} us decode")
+    print(
+        f"  saved {1 - len(lean_raw) / len(full_raw):.0%} bytes, "
+        f"{1 - lean_us / full_us:.0%} decode time"
+    )
+
+
+def bench_mongo(uri, count=2000, rounds=2000):
+    from pymongo import MongoClient
+
+    client = MongoClient(uri)
+    collection = client["bazarbin_bench"]["prices"]
+    collection.drop()
+    docs = [sample_doc(i) for i in range(count)]
+    collection.insert_many(docs)
+    ids = [doc["_id"] for doc in docs]
+
+    results = {}
+    for label, projection in (("full", None), ("lean", LEAN_FIELDS)):
+        start = time.perf_counter()
+        for i in range(rounds):
+            collection.find_one({"_id": ids[i % count]}, projection)
+        results[label] = (time.perf_counter() - start) / rounds * 1e3
+
+    print(f"Mongo find_one by _id ({uri})")
+    for label, ms in results.items():
+        print(f"  {label}: {ms:.3f} ms")
+    client.drop_database("bazarbin_bench")
+
+
+if __name__ == "__main__":
+    bench_bson()
+    if len(sys.argv) > 1:
+        bench_mongo(sys.argv[1])
@@ -0,0 +1,108 @@
+import threading
+import time
+
+from pymongo.errors import BulkWriteError
+
+INSERTED = "inserted"
+MATCHED = "matched"
+SUPERSEDED = "superseded"
+
+
+class BulkWriter:
+    """
+    Collect write operations and send them as unordered ``bulk_write``
+    batches, flushed by ``add`` once ``size`` operations are pending or the
+    oldest one is ``max_age`` seconds old. Age is only checked on ``add``,
+    so callers ``flush`` at the end of a run or event.
+
+    Every operation carries a ``tag`` (the scraper uses the message id) and
+    an optional ``key``; a newer operation with the same key replaces the
+    pending one, so two messages of the same minute never race each other
+    within one unordered batch. After each flush ``on_result(tag, status,
+    payload)`` is called per operation with INSERTED (upserted), MATCHED,
+    SUPERSEDED or the server's error message. If the server cannot be
+    reached the batch stays pending and ``flush`` raises.
+    """
+
+    def __init__(self, collection, size=500, max_age=2.0, on_result=None):
+        self.collection = collection
+        self.size = size
+        self.max_age = max_age
+        self.on_result = on_result
+        self.batches = self.written = self.failed = 0
+        self._pending = {}
+        self._oldest = None
+        self._lock = threading.Lock()
+
+    def add(self, op, tag=None, key=None, payload=None):
+        with self._lock:
+            if key is None:
+                key = object()
+            replaced = self._pending.pop(key, None)
+            self._pending[key] = (op, tag, payload)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = len(self._pending) >= self.size or self._is_old()
+        if replaced is not None:
+            self._report(replaced[1], SUPERSEDED, replaced[2])
+        if due:
+            self.flush()
+
+    def _is_old(self):
+        return (
+            self._oldest is not None and time.monotonic() - self._oldest >= self.max_age
+        )
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            pending = self._pending
+            self._pending = {}
+            oldest, self._oldest = self._oldest, None
+        items = list(pending.values())
+
+        upserted, errors = set(), {}
+        try:
+            result = self.collection.bulk_write(
+                [op for op, _, _ in items], ordered=False
+            )
+            upserted = set(result.upserted_ids)
+        except BulkWriteError as e:
+            details = e.details
+            upserted = {u["index"] for u in details.get("upserted", [])}
+            errors = {w["index"]: w["errmsg"] for w in details["writeErrors"]}
+        except Exception:
+            # Nothing is known to be written; keep the batch for the next try
+            with self._lock:
+                pending.update(self._pending)
+                self._pending = pending
+                self._oldest = oldest
+            raise
+        self.batches += 1
+        self.failed += len(errors)
+        self.written += len(items) - len(errors)
+
+        for i, (_, tag, payload) in enumerate(items):
+            if i in errors:
+                status = errors[i]
+            elif i in upserted:
+                status = INSERTED
+            else:
+                status = MATCHED
+            self._report(tag, status, payload)
+
+    def _report(self, tag, status, payload):
+        if self.on_result is not None:
+            try:
+                self.on_result(tag, status, payload)
+            except Exception as e:
+                print(f"Exception in BulkWriter on_result: {e}")
+
+    def stats(self):
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "written": self.written,
+            "failed": self.failed,
+        }
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+
+
+class Checkpoint:
+    """
+    Highest message id of a channel that a scraper has fully processed,
+    kept in the ``checkpoints`` collection as ``{_id: channel, last_id}``.
+
+    Scrapers read the channel oldest-first with ``min_id=last_id``, so a
+    routine run only fetches new messages and an interrupted backfill picks
+    up where it stopped. The id is written every ``every`` messages and on
+    ``flush``; after a crash at most that many messages are read again,
+    which the scrapers' per-minute upserts make harmless. ``before_flush``
+    runs first so buffered writes land before the id that covers them.
+    """
+
+    def __init__(self, collection, channel, every=100, before_flush=None):
+        self.collection = collection
+        self.channel = channel
+        self.every = every
+        self.before_flush = before_flush
+        doc = collection.find_one({"_id": channel})
+        self.last_id = doc["last_id"] if doc else 0
+        self._saved = self.last_id
+        self._unsaved = 0
+
+    def advance(self, message_id):
+        if message_id <= self.last_id:
+            return
+        self.last_id = message_id
+        self._unsaved += 1
+        if self._unsaved >= self.every:
+            self.flush()
+
+    def flush(self):
+        if self.before_flush is not None:
+            # e.g. the scraper's BulkWriter: only ids whose writes are done.
+            # Also when the id is unchanged, a re-scan still has writes.
+            self.before_flush()
+        if self.last_id == self._saved:
+            return
+        # $max keeps two overlapping runs from moving the checkpoint back
+        self.collection.update_one(
+            {"_id": self.channel},
+            {
+                "$max": {"last_id": self.last_id},
+                "$set": {"updated": datetime.now(timezone.utc)},
+            },
+            upsert=True,
+        )
+        self._saved = self.last_id
+        self._unsaved = 0
@@ -1,57 +1,138 @@
+import ast
+import json
 import re
 from typing import Literal
 
-lines = None
+# Keys of the JSON channel's posts
+json_usd_dict = {
+    "صداقت": "sedaghat",
+    "سبزه": "sabze",
+    "تهران": "tehran",
+    "بن بست": "bonbast",
+    "بن\u200cبست": "bonbast",
+}
+json_gold_dict = {
+    "اونس طلا": "ounce",
+    "مظنه بازار تهران": "tehran_market_price",
+    "طلای 18 عیار": "18_karat_gold",
+    "سکه قدیم": "old_coin",
+    "سکه جدید": "new_coin",
+}
+json_coin_dict = {
+    "بیت\u200cکوین": "btc",
+    "اتر": "eth",
+    "ماتیک": "pol",
+    "فانتوم": "ftm",
+    "مونرو": "xmr",
+}
+
+
+def parse_text(text):
+    """Prices of a CHANNEL_USERNAME post, or None for posts without prices."""
+    if text and (text.startswith("دلار (USD)") or text.startswith("USDT (تتر)")):
+        return get_data(text)
+    return None
+
+
+def parse_json_text(text):
+    """Prices of a CHANNEL_JSON post, or None for posts without prices."""
+    if text and text.startswith("{"):
+        return get_json_data(decode_json_post(text))
+    return None
+
+
+def decode_json_post(text):
+    """
+    JSON first; only legacy posts written as a Python dict repr (single
+    quotes) fall back to ``ast.literal_eval``. Raises if both fail.
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        return ast.literal_eval(text)
+
+
+# Section headers of a CHANNEL_USERNAME post, in the order they are posted
+SECTIONS = {
+    "دلار (USD)": "usd",
+    "USDT (تتر)": "usdt",
+    "طلا (GOLD)": "gold",
+    "Ethereum Gas": "gas",
+    "رمز ارز (Cryptocurrency)": "crypto",
+}
+# A section is complete once the next header starts; the last one once the
+# Jalali date line that ends every post does (1403/..., 1404-..., 1405 ...)
+NEXT_SECTION = {
+    "usd": "usdt",
+    "usdt": "gold",
+    "gold": "gas",
+    "gas": "crypto",
+    "crypto": "date",
+}
+DATE_LINE = re.compile(r"1[34]\d\d")
+GOLD_KEYS = {
+    "اونس طلا": "ounce",
+    "مظنه بازار تهران": "tehran_market_price",
+    "طلای 18 عیار": "18_karat_gold",
+    "سکه قدیم": "old_coin",
+    "سکه جدید": "new_coin",
+    "ربع سکه": "quarter_coin",
+}
+GOLD_KEY = re.compile("|".join(map(re.escape, GOLD_KEYS)))
+COIN_KEYS = {"بیت\u200cکوین": "btc", "اتر": "eth", "بی\u200cان\u200cبی": "bnb"}
+COIN_KEY = re.compile("|".join(map(re.escape, COIN_KEYS)))
 
 
 def get_data(text):
+    """
+    Read a post in one pass over its lines. Each line is parsed into the
+    state of the section it belongs to, and that state is merged into the
+    snapshot only when the section is complete, so a post cut short keeps
+    the sections before the cut. A parse error is raised at that point too,
+    not for an incomplete section. Keeps no module state, so posts can be
+    parsed from several threads at once.
+    """
     data_dict = get_data_dict()
-    s_usd, e_usd, s_usdt, e_usdt, s_gold, e_gold, s_gas, e_gas, s_crypto, e_crypto = [
-        None for i in range(10)
-    ]
-    global lines
-    lines = text.split("\n")
-    for idx, line in enumerate(lines):
-        if "دلار (USD)" in line:
-            s_usd = idx + 1
+    section = state = parse_line = error = None
+    for line in text.split("\n"):
+        if not line:
+            continue
+        # Headers carry no "label: price" colon, so most lines skip the lookup
+        name = None if ":" in line else section_of(line)
+        if name is None:
+            if section == "crypto" and DATE_LINE.match(line):
+                name = "date"
+            else:
+                if parse_line is not None and error is None:
+                    try:
+                        parse_line(state, line)
+                    except Exception as e:
+                        error = e
+                continue
+
+        if section is not None and NEXT_SECTION[section] == name:
+            if error is not None:
+                raise error
+            SECTION_PARSERS[section][2](data_dict, state)
+        if name == "usd":
             data_dict["currency_rates"]["usd"] = {}
-        elif "USDT (تتر)" in line:
-            if s_usd:
-                e_usd = idx - 1
-            s_usdt = idx + 1
-        elif "طلا (GOLD)" in line:
-            if s_usdt:
-                e_usdt = idx - 1
-            s_gold = idx + 1
-        elif "Ethereum Gas" in line:
-            if s_gold:
-                e_gold = idx - 1
-            s_gas = idx + 1
-        elif "رمز ارز (Cryptocurrency)" in line:
-            if s_gas:
-                e_gas = idx - 1
-            s_crypto = idx + 1
-        elif line.startswith("1404"):
-            if s_crypto:
-                e_crypto = idx - 1
-
-    if s_usd and e_usd:
-        data_dict = fill_usd(data_dict, s_usd, e_usd)
-
-    if s_usdt and e_usdt:
-        data_dict = fill_usdt(data_dict, s_usdt, e_usdt)
-
-    if s_gold and e_gold:
-        data_dict = fill_gold(data_dict, s_gold, e_gold)
-
-    if s_gas and e_gas:
-        data_dict = fill_gas(data_dict, s_gas, e_gas)
-
-    if s_crypto and e_crypto:
-        data_dict = fill_crypto(data_dict, s_crypto, e_crypto)
+        if name in SECTION_PARSERS:
+            section = name
+            new_state, parse_line, _ = SECTION_PARSERS[name]
+            state = new_state()
+        else:
+            section = state = parse_line = None
+        error = None
     return data_dict
 
 
+def section_of(line):
+    for header, name in SECTIONS.items():
+        if header in line:
+            return name
+    return None
+
+
 def get_data_dict():
     return {
         "currency_rates": {
@@ -71,114 +152,135 @@ def get_data_dict():
     }
 
 
-def fill_usd(final_dict, start, end):
-    for i in range(start, end + 1):
-        if "|" in lines[i]:
-            parts = lines[i].split("|")
-            buy = to_int(parts[0].split(":")[-1].strip())
-            sell = to_int(parts[1].strip())
-            if "فردایی" in lines[i]:
-                for ch in ("sabze", "tehran"):
-                    if "fardayie" not in final_dict["currency_rates"]["usd"]:
-                        final_dict["currency_rates"]["usd"].update(
-                            {"fardayie": {ch: {"buy": buy, "sell": sell}}}
-                        )
-                    else:
-                        final_dict["currency_rates"]["usd"]["fardayie"][ch] = {
-                            "buy": buy,
-                            "sell": sell,
-                        }
-            elif "نقدی" in lines[i]:
-                for ch in ("sabze", "tehran"):
-                    if "naghdi" not in final_dict["currency_rates"]["usd"]:
-                        final_dict["currency_rates"]["usd"].update(
-                            {"naghdi": {ch: {"buy": buy, "sell": sell}}}
-                        )
-                    else:
-                        final_dict["currency_rates"]["usd"]["naghdi"][ch] = {
-                            "buy": buy,
-                            "sell": sell,
-                        }
-            elif "سبزه" in lines[i] or "تهران" in lines[i]:
-                if "combination" not in final_dict["currency_rates"]["usd"]:
-                    final_dict["currency_rates"]["usd"].update(
-                        {"combination": {"buy": buy, "sell": sell}}
-                    )
-            elif "بن‌بست" in lines[i]:
-                if "bonbast" not in final_dict["currency_rates"]["usd"]:
-                    final_dict["currency_rates"]["usd"].update(
-                        {"bonbast": {"buy": buy, "sell": sell}}
-                    )
-        elif lines[i] and "tgju" in lines[i]:
-            price = to_int(lines[i].split(":")[-1].strip())
-            if "tgju" not in final_dict["currency_rates"]["usd"]:
-                final_dict["currency_rates"]["usd"].update({"tgju": {"price": price}})
-    return final_dict
-
-
-def fill_usdt(final_dict, start, end):
-    for i in range(start, end + 1):
-        if lines[i]:
-            name = re.search(r"\[(.* ?)\]", lines[i]).group(1).lower()
-            parts = lines[i].split("|")
-            bid = to_int(
-                parts[0].split(":")[-1].replace("✴️", "").replace("❇️", "").strip()
-            )
-            ask = to_int(parts[1].replace("✴️", "").replace("❇️", "").strip())
-            final_dict["currency_rates"]["usdt"][name]["bid"] = bid
-            final_dict["currency_rates"]["usdt"][name]["ask"] = ask
-    return final_dict
-
-
-def fill_gold(final_dict, start, end):
-    gold_dict = {
-        "اونس طلا": "ounce",
-        "مظنه بازار تهران": "tehran_market_price",
-        "طلای 18 عیار": "18_karat_gold",
-        "سکه قدیم": "old_coin",
-        "سکه جدید": "new_coin",
-        "ربع سکه": "quarter_coin",
-    }
-    for i in range(start, end + 1):
-        for key, value in gold_dict.items():
-            if key in lines[i] and not final_dict["gold_prices"]["tala.ir"]:
-                price = to_int(lines[i].split(":")[-1].replace("$", "").strip())
-                final_dict["gold_prices"]["tala.ir"] = {value: {"price": price}}
-            elif key in lines[i]:
-                price = to_int(lines[i].split(":")[-1].strip())
-                final_dict["gold_prices"]["tala.ir"][value] = {"price": price}
-    return final_dict
-
-
-def fill_gas(final_dict, start, end):
-    for i in range(start, end + 1):
-        if lines[i]:
-            parts = [p.strip() for p in lines[i].split("|")]
-            prices = [parts[-3].split(":")[-1].strip(), parts[-2], parts[-1]]
-            new_prices = []
-            for price in prices:
-                if price != "خطا":
-                    new_prices.append(float(price))
-                else:
-                    new_prices.append(price)
-            final_dict["crypto"]["eth_gas"].extend(new_prices)
-    return final_dict
-
-
-def fill_crypto(final_dict, start, end):
-    coin_dict = {"بیت‌کوین": "btc", "اتر": "eth", "بی‌ان‌بی": "bnb"}
-    for i in range(start, end + 1):
-        for key, value in coin_dict.items():
-            if key in lines[i]:
-                price = to_int(lines[i].split(":")[-1].replace("$", "").strip())
-                final_dict["crypto"][value] = {"price": price}
-    return final_dict
+def parse_usd_line(usd, line):
+    if "|" in line:
+        parts = line.split("|")
+        buy = to_int(parts[0].rpartition(":")[2].strip())
+        sell = to_int(parts[1].strip())
+        if "فردایی" in line:
+            fardayie = usd.setdefault("fardayie", {})
+            fardayie["sabze"] = {"buy": buy, "sell": sell}
+            fardayie["tehran"] = {"buy": buy, "sell": sell}
+        elif "نقدی" in line:
+            naghdi = usd.setdefault("naghdi", {})
+            naghdi["sabze"] = {"buy": buy, "sell": sell}
+            naghdi["tehran"] = {"buy": buy, "sell": sell}
+        elif "سبزه" in line or "تهران" in line:
+            usd.setdefault("combination", {"buy": buy, "sell": sell})
+        elif "بن‌بست" in line:
+            usd.setdefault("bonbast", {"buy": buy, "sell": sell})
+    elif line and "tgju" in line:
+        usd.setdefault("tgju", {"price": to_int(line.rpartition(":")[2].strip())})
+
+
+def parse_usdt_line(rows, line):
+    if line:
+        # The exchange is the link text: [Nobitex_150](https://...)
+        name = line[line.index("[") + 1 : line.rindex("]")].lower()
+        parts = line.split("|")
+        bid = to_int(
+            parts[0].rpartition(":")[2].replace("✴️", "").replace("❇️", "").strip()
+        )
+        ask = to_int(parts[1].replace("✴️", "").replace("❇️", "").strip())
+        rows.append((name, bid, ask))
+
+
+def parse_gold_line(tala, line):
+    key = GOLD_KEY.search(line)
+    if key is not None:
+        if not tala:
+            # The first row is the ounce, priced in dollars
+            price = to_int(line.rpartition(":")[2].replace("$", "").strip())
+        else:
+            price = to_int(line.rpartition(":")[2].strip())
+        tala[GOLD_KEYS[key.group()]] = {"price": price}
+
+
+def parse_gas_line(prices, line):
+    if line:
+        parts = [p.strip() for p in line.split("|")]
+        row = [parts[-3].rpartition(":")[2].strip(), parts[-2], parts[-1]]
+        prices.extend(price if price == "خطا" else float(price) for price in row)
+
+
+def parse_crypto_line(coins, line):
+    key = COIN_KEY.search(line)
+    if key is not None:
+        price = to_int(line.rpartition(":")[2].replace("$", "").strip())
+        coins[COIN_KEYS[key.group()]] = {"price": price}
+
+
+def merge_usd(data_dict, usd):
+    data_dict["currency_rates"]["usd"] = usd
+
+
+def merge_usdt(data_dict, rows):
+    usdt = data_dict["currency_rates"]["usdt"]
+    for name, bid, ask in rows:
+        usdt[name]["bid"] = bid
+        usdt[name]["ask"] = ask
+
+
+def merge_gold(data_dict, tala):
+    data_dict["gold_prices"]["tala.ir"] = tala
+
+
+def merge_gas(data_dict, prices):
+    data_dict["crypto"]["eth_gas"].extend(prices)
+
+
+def merge_crypto(data_dict, coins):
+    data_dict["crypto"].update(coins)
+
+
+# section -> (new state, parse a line into it, merge it into the snapshot)
+SECTION_PARSERS = {
+    "usd": (dict, parse_usd_line, merge_usd),
+    "usdt": (list, parse_usdt_line, merge_usdt),
+    "gold": (dict, parse_gold_line, merge_gold),
+    "gas": (list, parse_gas_line, merge_gas),
+    "crypto": (dict, parse_crypto_line, merge_crypto),
+}
 
 
 def to_int(price: str | None) -> Literal["خطا"] | float | int:
     if price == "خطا" or price is None:
         return "خطا"
-    elif "." in str(price):
+    price = str(price)
+    if "." in price:
         return float(price)
     else:
-        return int(str(price).replace(",", ""))
+        return int(price.replace(",", ""))
+
+
+def get_json_data(the_data):
+    data_dict = get_data_dict()
+    data_dict["crypto"] = {}
+    for k, v in the_data.items():
+        if k == "USD":
+            for k1, v1 in v.items():
+                buy, sell = to_int(v1["buy"]), to_int(v1["sell"])
+                if "usd" not in data_dict["currency_rates"]:
+                    data_dict["currency_rates"]["usd"] = {}
+                data_dict["currency_rates"]["usd"].update(
+                    {json_usd_dict[k1]: {"buy": buy, "sell": sell}}
+                )
+        elif k == "USDT":
+            for k1, v1 in v.items():
+                bid, ask = to_int(v1["buy"]), to_int(v1["sell"])
+                if k1.lower() in data_dict["currency_rates"]["usdt"]:
+                    data_dict["currency_rates"]["usdt"][k1.lower()] = {
+                        "ask": ask,
+                        "bid": bid,
+                    }
+        elif k == "GOLD":
+            for k1, v1 in v.items():
+                price = to_int(v1["price"].replace("$", ""))
+                data_dict["gold_prices"]["tala.ir"].update(
+                    {json_gold_dict[k1]: {"price": price}}
+                )
+        elif k == "Cryptocurrency":
+            for k1, v1 in v.items():
+                price = to_int(v1["price"])
+                data_dict["crypto"].update({json_coin_dict[k1]: {"price": price}})
+    return data_dict
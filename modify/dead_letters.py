@@ -0,0 +1,37 @@
+import traceback
+from datetime import datetime, timezone
+
+
+class DeadLetters:
+    """
+    Posts a scraper could not parse, kept in the ``dead_letters`` collection
+    with their raw text and the error so they can be fixed and replayed
+    instead of stopping the run. One document per channel and message id,
+    so a re-scan overwrites rather than duplicates.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.added = 0
+
+    def add(self, channel, message_id, date, text, error):
+        self.collection.update_one(
+            {"_id": f"{channel}:{message_id}"},
+            {
+                "$set": {
+                    "channel": channel,
+                    "message_id": message_id,
+                    "date": date,
+                    "text": text,
+                    "error": "".join(
+                        traceback.format_exception_only(type(error), error)
+                    ).strip(),
+                    "updated": datetime.now(timezone.utc),
+                }
+            },
+            upsert=True,
+        )
+        self.added += 1
+
+    def stats(self):
+        return {"added": self.added}
@@ -0,0 +1,188 @@
+"""
+Backfill the prices collection from a Telegram Desktop channel export
+(Export chat history -> JSON), with no network and no Telegram rate limits.
+
+    python import_export.py result.json           # CHANNEL_USERNAME posts
+    python import_export.py result.json --json    # CHANNEL_JSON posts
+
+``result.json`` is streamed: only the messages array is decoded, one
+message at a time from a fixed-size read buffer, so a multi-hundred-MB
+export needs a few MB of memory. Messages go through the same parsers,
+upserts and BulkWriter as the live scraper (via ``run_pipeline``), so
+re-importing is harmless. Progress is kept in a checkpoint named after the
+export's chat id and an interrupted import resumes from it; ``--full``
+starts over. ``--advance-channel`` also moves the live scraper's
+checkpoint to the last imported message so it only fetches newer ones.
+"""
+
+import asyncio
+import json
+import re
+import sys
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from checkpoints import Checkpoint
+from jalali import localize_tehran
+from pipeline import run_pipeline
+
+CHUNK_SIZE = 1 << 20
+FETCH_BATCH = 500
+MESSAGES = re.compile(r'"messages"\s*:\s*\[')
+SEPARATORS = " \t\r\n,"
+
+ExportMessage = namedtuple("ExportMessage", "id date text")
+
+# Telegram Desktop splits formatted text into entities; Telethon's
+# message.text is markdown, which is what the parsers were written against
+MARKDOWN = {
+    "bold": "**{}**",
+    "italic": "__{}__",
+    "strikethrough": "~~{}~~",
+    "code": "`{}`",
+    "pre": "```{}```",
+}
+
+
+def export_text(text):
+    if isinstance(text, str):
+        return text
+    parts = []
+    for part in text:
+        if isinstance(part, str):
+            parts.append(part)
+        elif part["type"] in MARKDOWN:
+            parts.append(MARKDOWN[part["type"]].format(part["text"]))
+        elif part["type"] == "text_link":
+            parts.append(f"[{part['text']}]({part['href']})")
+        elif part["type"] == "mention_name":
+            parts.append(f"[{part['text']}](tg://user?id={part['user_id']})")
+        else:
+            parts.append(part["text"])
+    return "".join(parts)
+
+
+def export_date(message):
+    if "date_unixtime" in message:
+        return datetime.fromtimestamp(int(message["date_unixtime"]), timezone.utc)
+    # Exports before date_unixtime only have the exporting machine's local
+    # time, taken to be Tehran's like the channel's
+    date = datetime.fromisoformat(message["date"])
+    if date.tzinfo is None:
+        date = localize_tehran(date)
+    return date.astimezone(timezone.utc)
+
+
+def read_export(path, chunk_size=CHUNK_SIZE):
+    """
+    Return the export header (name, type, id, ...) and a generator over its
+    messages, decoded one by one from a ``chunk_size`` read buffer.
+    """
+    f = open(path, encoding="utf-8")
+    buffer = ""
+    while (match := MESSAGES.search(buffer)) is None:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            f.close()
+            raise ValueError(f"{path} has no messages array")
+        buffer += chunk
+    # Single-chat exports list the header fields before the messages
+    try:
+        header = json.loads(buffer[: match.start()].rstrip(SEPARATORS) + "}")
+    except ValueError:
+        header = {}
+    return header, _messages(f, buffer, match.end(), chunk_size)
+
+
+def _messages(f, buffer, pos, chunk_size):
+    decoder = json.JSONDecoder()
+    eof = False
+    with f:
+        while True:
+            while pos < len(buffer) and buffer[pos] in SEPARATORS:
+                pos += 1
+            if buffer.startswith("]", pos):
+                return
+            try:
+                message, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Usually a message cut by the end of the buffer
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            if message.get("type") == "message":
+                yield ExportMessage(
+                    message["id"], export_date(message), export_text(message["text"])
+                )
+
+
+async def aiter_messages(messages, min_id=0):
+    """Pull the blocking file reads off the event loop in batches."""
+    while True:
+        batch = await asyncio.to_thread(_next_batch, messages, min_id)
+        if not batch:
+            return
+        for message in batch:
+            yield message
+
+
+def _next_batch(messages, min_id):
+    batch = []
+    for message in messages:
+        if message.id > min_id:
+            batch.append(message)
+            if len(batch) >= FETCH_BATCH:
+                break
+    return batch
+
+
+async def main(path, scraper, parse, full=False, advance_channel=None):
+    header, messages = read_export(path)
+    name = f"export:{header.get('id', path)}"
+    checkpoint = Checkpoint(
+        scraper.checkpoints, name, before_flush=scraper.flush_writes
+    )
+    min_id = 0 if full else checkpoint.last_id
+    print(f"Importing {header.get('name', path)} after message {min_id}")
+    await run_pipeline(
+        aiter_messages(messages, min_id),
+        checkpoint,
+        parse,
+        scraper.write_message,
+        on_error=getattr(scraper, "dead_letter", None),
+    )
+    print(f"All messages saved to MongoDB. Checkpoint: {checkpoint.last_id}")
+    if advance_channel:
+        channel = Checkpoint(scraper.checkpoints, advance_channel)
+        channel.advance(checkpoint.last_id)
+        channel.flush()
+        print(f"{advance_channel} checkpoint: {channel.last_id}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0].startswith("--"):
+        sys.exit(__doc__)
+    if "--json" in args:
+        import save_data_json as scraper
+        from db_data import parse_json_text as parse
+        from secret import CHANNEL_JSON as channel
+    else:
+        import save_data as scraper
+        from db_data import parse_text as parse
+        from secret import CHANNEL_USERNAME as channel
+
+    scraper.ensure_indexes(scraper.rollups)
+    asyncio.run(
+        main(
+            args[0],
+            scraper,
+            parse,
+            full="--full" in args,
+            advance_channel=channel if "--advance-channel" in args else None,
+        )
+    )
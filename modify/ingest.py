@@ -0,0 +1,111 @@
+"""
+Long-running ingest: keep the prices collection seconds behind both channels.
+
+New posts on CHANNEL_USERNAME and CHANNEL_JSON are saved as they arrive
+(the same parsing and upserts as save_data.py / save_data_json.py) and
+edited posts overwrite their snapshot. Live events only write; the
+checkpoints are advanced by ``sync`` sweeps, run on every (re)connect and
+every INGEST_SWEEP_SECONDS, which re-read everything after the checkpoint
+and so fill any gap left while disconnected.
+
+    python ingest.py
+"""
+
+import asyncio
+
+from telethon import events
+
+import save_data
+import save_data_json
+from log import add_log
+from rollups import ensure_indexes, rebuild_buckets
+from secret import *
+
+SCRAPERS = {CHANNEL_USERNAME: save_data, CHANNEL_JSON: save_data_json}
+
+# Filled in once connected: channel peer id -> scraper module
+scrapers_by_id = {}
+sweep_lock = asyncio.Lock()
+# Rebuilt buckets are replaced whole, so no other rollup write may land
+# between reading their snapshots and replacing them
+write_lock = asyncio.Lock()
+
+
+def scraper_for(event):
+    return scrapers_by_id[event.chat_id]
+
+
+def save_now(scraper, message, edited=False):
+    # pymongo blocks, so this runs off the event loop
+    scraper.save_message(message, edited=edited)
+    scraper.flush_writes()
+
+
+async def on_new_message(event):
+    try:
+        scraper = scraper_for(event)
+        async with write_lock:
+            await asyncio.to_thread(save_now, scraper, event.message)
+    except Exception as e:
+        print(f"Exception in on_new_message: {e}")
+        add_log(f"Exception in ingest on_new_message:\n{e}")
+
+
+async def on_message_edited(event):
+    try:
+        scraper = scraper_for(event)
+        async with write_lock:
+            await asyncio.to_thread(save_now, scraper, event.message, edited=True)
+            # The old prices are already folded into that minute's buckets
+            await asyncio.to_thread(
+                rebuild_buckets,
+                scraper.collection,
+                scraper.rollups,
+                event.message.date,
+            )
+    except Exception as e:
+        print(f"Exception in on_message_edited: {e}")
+        add_log(f"Exception in ingest on_message_edited:\n{e}")
+
+
+async def sweep(client):
+    async with sweep_lock, write_lock:
+        for scraper in SCRAPERS.values():
+            try:
+                await scraper.sync(client)
+            except Exception as e:
+                print(f"Exception in sweep ({scraper.__name__}): {e}")
+                add_log(f"Exception in ingest sweep:\n{e}")
+
+
+async def sweep_periodically(client):
+    while True:
+        await asyncio.sleep(INGEST_SWEEP_SECONDS)
+        await sweep(client)
+
+
+async def main(client):
+    ensure_indexes(save_data.rollups)
+    chats = list(SCRAPERS)
+    client.add_event_handler(on_new_message, events.NewMessage(chats=chats))
+    client.add_event_handler(on_message_edited, events.MessageEdited(chats=chats))
+    sweeper = asyncio.create_task(sweep_periodically(client))
+    try:
+        while True:
+            await client.start()
+            for name, scraper in SCRAPERS.items():
+                scrapers_by_id[await client.get_peer_id(name)] = scraper
+            print("Ingest connected, filling the gap since the checkpoints ...")
+            await sweep(client)
+            await client.run_until_disconnected()
+            print("Ingest disconnected, reconnecting ...")
+            await asyncio.sleep(5)
+    finally:
+        sweeper.cancel()
+        for scraper in SCRAPERS.values():
+            scraper.flush_writes()
+
+
+if __name__ == "__main__":
+    client = save_data.make_client("ingest")
+    client.loop.run_until_complete(main(client))
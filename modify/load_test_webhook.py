@@ -0,0 +1,261 @@
+"""
+Benchmark webhook mode against polling offline: the same synthetic updates,
+offered at the same rate, with a fake Bot API standing in for Telegram.
+
+    python load_test_webhook.py --mode webhook --count 2000 --rate 200
+    python load_test_webhook.py --mode polling --count 2000 --rate 200
+
+The script serves the fake Bot API on 127.0.0.1:--api-port and starts the
+bot itself (``../webhook.py --local`` or ``../main.py``) with BOT_API_URL
+pointing at it. Updates are POSTed to the webhook, or handed out by the
+fake getUpdates to the polling bot. Every update comes from its own chat,
+and its latency runs from the moment it is offered until the bot's first
+Bot API call for that chat (the reply or forward), so the two modes are
+measured the same way. Webhook mode also reports how long the endpoint
+took to acknowledge. Only Telegram is faked: the bot still reads the
+local MongoDB.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_TEXTS = ["now", "0", "12:35", "-2h", "1404/08/19 12:35", "-1d 9:00", "1235"]
+# One chat per update, so the per-chat rate limit never kicks in
+FIRST_CHAT = 100000
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "load", "username": "load_bot"}
+
+
+def make_update(update_id, text):
+    chat_id = FIRST_CHAT + update_id
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": "load"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "load"},
+            "text": text,
+        },
+    }
+
+
+class FakeBotAPI:
+    """Just enough of the Bot API for the bot to start, poll and reply."""
+
+    def __init__(self):
+        self.updates = []
+        self.offered = {}
+        self.answered = {}
+        self.polled = threading.Event()
+        self.changed = threading.Condition()
+
+    def offer(self, update, queue=True):
+        """Start the clock of ``update``; ``queue`` it for getUpdates."""
+        with self.changed:
+            self.offered[update["message"]["chat"]["id"]] = time.perf_counter()
+            if queue:
+                self.updates.append(update)
+                self.changed.notify_all()
+
+    def call(self, method, params):
+        if method == "getUpdates":
+            return self.get_updates(params)
+        if "chat_id" in params:
+            chat_id = int(params["chat_id"])
+            with self.changed:
+                self.answered.setdefault(chat_id, time.perf_counter())
+                self.changed.notify_all()
+            return {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text", ""),
+            }
+        if method == "getMe":
+            return BOT_USER
+        return True
+
+    def get_updates(self, params):
+        self.polled.set()
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 100))
+        deadline = time.monotonic() + float(params.get("timeout", 0))
+        with self.changed:
+            # Updates below the offset are confirmed
+            self.updates = [u for u in self.updates if u["update_id"] >= offset]
+            while not self.updates and time.monotonic() < deadline:
+                self.changed.wait(deadline - time.monotonic())
+            return self.updates[:limit]
+
+    def done(self):
+        return all(chat_id in self.answered for chat_id in self.offered)
+
+
+def api_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.answer(b"")
+
+        def do_POST(self):
+            self.answer(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+        def answer(self, body):
+            # telebot sends its parameters in the query string
+            url = urlsplit(self.path)
+            params = dict(parse_qsl(url.query))
+            if self.headers.get_content_type() == "application/x-www-form-urlencoded":
+                params.update(parse_qsl(body.decode()))
+            result = api.call(url.path.rsplit("/", 1)[-1], params)
+            data = json.dumps({"ok": True, "result": result}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_bot(mode, api_port):
+    env = dict(
+        os.environ,
+        BOT_API_URL=f"http://127.0.0.1:{api_port}/bot{{0}}/{{1}}",
+        PROXY_SERVER="",
+        PROXY_PORT="",
+    )
+    if mode == "webhook":
+        args = [os.path.join(ROOT, "webhook.py"), "--local"]
+    else:
+        args = [os.path.join(ROOT, "main.py")]
+    return subprocess.Popen([sys.executable, *args], cwd=ROOT, env=env)
+
+
+def wait_ready(bot, api, mode, url, timeout):
+    deadline = time.monotonic() + timeout
+    target = urlsplit(url)
+    while time.monotonic() < deadline:
+        if bot.poll() is not None:
+            sys.exit(f"The bot exited with status {bot.returncode}")
+        if mode == "polling":
+            if api.polled.wait(0.2):
+                return
+            continue
+        try:
+            socket.create_connection((target.hostname, target.port), 1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    sys.exit(f"The bot was not ready after {timeout}s")
+
+
+def post(url, secret, body):
+    request = urllib.request.Request(url, data=body, method="POST")
+    request.add_header("Content-Type", "application/json")
+    if secret:
+        request.add_header("X-Telegram-Bot-Api-Secret-Token", secret)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = "error"
+    return status, time.perf_counter() - start
+
+
+def offer_all(api, args, updates):
+    """Offer ``updates`` at ``args.rate`` per second; returns the webhook acks."""
+    interval = 1 / args.rate
+    futures = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        for i, update in enumerate(updates):
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if args.mode == "webhook":
+                api.offer(update, queue=False)
+                body = json.dumps(update).encode()
+                futures.append(pool.submit(post, args.url, args.secret, body))
+            else:
+                api.offer(update)
+        return [future.result() for future in futures]
+
+
+def print_latencies(label, latencies):
+    latencies = sorted(latency * 1000 for latency in latencies)
+    if len(latencies) < 2:
+        print(f"{label}: {latencies}")
+        return
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label} ms: p50={quantiles[49]:.2f} p95={quantiles[94]:.2f} "
+        f"p99={quantiles[98]:.2f} max={latencies[-1]:.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["webhook", "polling"], default="webhook")
+    parser.add_argument("--url", default="http://127.0.0.1:8443/webhook")
+    parser.add_argument("--secret", default="")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=200, help="updates per second")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--startup", type=float, default=60, help="seconds")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds")
+    args = parser.parse_args()
+
+    api = FakeBotAPI()
+    server = ThreadingHTTPServer(("127.0.0.1", args.api_port), api_handler(api))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    bot = start_bot(args.mode, args.api_port)
+    try:
+        wait_ready(bot, api, args.mode, args.url, args.startup)
+        texts = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] for i in range(args.count)]
+        updates = [make_update(i + 1, text) for i, text in enumerate(texts)]
+
+        start = time.perf_counter()
+        acks = offer_all(api, args, updates)
+        with api.changed:
+            api.changed.wait_for(api.done, args.timeout)
+        elapsed = time.perf_counter() - start
+    finally:
+        bot.terminate()
+        bot.wait(10)
+        server.shutdown()
+
+    latencies = [
+        api.answered[chat_id] - offered
+        for chat_id, offered in api.offered.items()
+        if chat_id in api.answered
+    ]
+    print(f"{args.mode}: {args.count} updates at {args.rate:g}/s in {elapsed:.2f}s")
+    print(f"answered: {len(latencies)}/{args.count}")
+    print_latencies("offered -> answered", latencies)
+    if acks:
+        print(f"webhook status: {dict(Counter(status for status, _ in acks))}")
+        print_latencies("webhook ack", [latency for _, latency in acks])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import threading
+from datetime import datetime, timedelta
+
+
+class MinuteBuckets:
+    """
+    Minutes that already have a snapshot in the prices collection, so the
+    scraper can skip those messages without a database round trip.
+
+    Each UTC day is a 1440-bit bitmap (180 bytes), loaded with one
+    timestamp-only query the first time a minute of that day is looked up.
+    A re-scan of an imported channel therefore costs one query per day
+    instead of one write per message. ``add`` marks a minute as taken when
+    its insert is queued and ``discard`` undoes that if the write fails.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.loads = self.hits = self.misses = 0
+        self._days = {}
+        self._lock = threading.Lock()
+
+    def _bitmap(self, dt):
+        day = dt.toordinal()
+        bitmap = self._days.get(day)
+        if bitmap is None:
+            bitmap = self._days[day] = self._load(day)
+        return bitmap
+
+    def _load(self, day):
+        start = datetime.fromordinal(day)
+        bitmap = bytearray(180)
+        cursor = self.collection.find(
+            {"timestamp": {"$gte": start, "$lt": start + timedelta(days=1)}},
+            {"_id": 0, "timestamp": 1},
+        )
+        for doc in cursor:
+            ts = doc["timestamp"]
+            minute = ts.hour * 60 + ts.minute
+            bitmap[minute >> 3] |= 1 << (minute & 7)
+        self.loads += 1
+        return bitmap
+
+    def __contains__(self, dt):
+        minute = dt.hour * 60 + dt.minute
+        with self._lock:
+            found = bool(self._bitmap(dt)[minute >> 3] & (1 << (minute & 7)))
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found
+
+    def add(self, dt):
+        minute = dt.hour * 60 + dt.minute
+        with self._lock:
+            self._bitmap(dt)[minute >> 3] |= 1 << (minute & 7)
+
+    def discard(self, dt):
+        minute = dt.hour * 60 + dt.minute
+        with self._lock:
+            bitmap = self._days.get(dt.toordinal())
+            if bitmap is not None:
+                bitmap[minute >> 3] &= ~(1 << (minute & 7)) & 0xFF
+
+    def stats(self):
+        return {
+            "days": len(self._days),
+            "loads": self.loads,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
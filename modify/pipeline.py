@@ -0,0 +1,147 @@
+"""
+Pipelined message reader behind the scrapers' ``sync`` and the export
+importer.
+
+    fetch (event loop) -> fetched -> parse (process pool) -> parsed -> write (thread)
+
+Fetching stays on the event loop, parsing runs in
+PIPELINE_WORKERS processes and the blocking pymongo writes run on one
+writer thread, so network, CPU and database time overlap instead of
+adding up. Both queues hold at most PIPELINE_QUEUE items: a slow stage
+makes the ones before it wait, which keeps memory flat over a full
+backfill. Parse results are written in channel order, so the checkpoint
+only ever covers messages whose writes were handed to the BulkWriter.
+
+The worker processes are started once per process and reused by every
+run (ingest sweeps every few minutes). They come from a forkserver, not
+fork, so they do not inherit the caller's threads, sockets or Mongo
+connections.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from secret import PIPELINE_QUEUE, PIPELINE_WORKERS
+
+DONE = None
+START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# workers -> ProcessPoolExecutor
+_pools = {}
+
+
+def parse_pool(workers=PIPELINE_WORKERS):
+    """The process pool of ``workers`` parsers, started on first use."""
+    pool = _pools.get(workers)
+    if pool is None:
+        context = multiprocessing.get_context(START_METHOD)
+        if START_METHOD == "forkserver":
+            # Workers fork with the parsers already imported
+            context.set_forkserver_preload(["db_data"])
+        pool = _pools[workers] = ProcessPoolExecutor(workers, mp_context=context)
+    return pool
+
+
+async def run_pipeline(
+    messages,
+    checkpoint,
+    parse,
+    write,
+    on_error=None,
+    workers=PIPELINE_WORKERS,
+    depth=PIPELINE_QUEUE,
+):
+    """
+    For every message of the async iterable ``messages`` (oldest first;
+    anything with ``id``, ``date`` and ``text``), call ``parse(text)`` in a
+    worker process and then ``write(message_id, date, data)`` on the writer
+    thread, advancing ``checkpoint`` past it.
+    ``parse`` must be a module-level function so it can be pickled. If it
+    raises and ``on_error`` is given, ``on_error(message_id, date, text,
+    error)`` is called on the writer thread instead and the run goes on;
+    otherwise the run stops at that message.
+    """
+    loop = asyncio.get_running_loop()
+    fetched = asyncio.Queue(depth)
+    parsed = asyncio.Queue(depth)
+    written = 0
+
+    async def fetch():
+        async for message in messages:
+            await fetched.put((message.id, message.date, message.text))
+        await fetched.put(DONE)
+
+    async def dispatch(pool):
+        while (item := await fetched.get()) is not DONE:
+            message_id, date, text = item
+            # Queued in channel order; the writer awaits them in that order
+            future = loop.run_in_executor(pool, parse, text)
+            await parsed.put((message_id, date, text, future))
+        await parsed.put(DONE)
+
+    def write_batch(batch):
+        nonlocal written
+        for message_id, date, data, failure in batch:
+            if failure is None:
+                write(message_id, date, data)
+            else:
+                on_error(message_id, date, *failure)
+            checkpoint.advance(message_id)
+        written += len(batch)
+
+    async def drain(writer):
+        done = False
+        while not done:
+            batch = []
+            item = await parsed.get()
+            while True:
+                if item is DONE:
+                    done = True
+                    break
+                message_id, date, text, future = item
+                try:
+                    batch.append((message_id, date, await future, None))
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    batch.append((message_id, date, None, (text, e)))
+                if len(batch) >= depth or parsed.empty():
+                    break
+                item = parsed.get_nowait()
+            if batch:
+                await loop.run_in_executor(writer, write_batch, batch)
+
+    started = time.perf_counter()
+    pool = parse_pool(workers)
+    writer = ThreadPoolExecutor(1, thread_name_prefix="pipeline-writer")
+    tasks = [
+        asyncio.create_task(fetch()),
+        asyncio.create_task(dispatch(pool)),
+        asyncio.create_task(drain(writer)),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BrokenProcessPool:
+        # A worker died; the next run starts a fresh pool
+        _pools.pop(workers, None)
+        raise
+    finally:
+        for task in tasks:
+            task.cancel()
+        # The pool outlives this run, so drop the parses it still queues
+        while not parsed.empty():
+            if (item := parsed.get_nowait()) is not DONE:
+                item[3].cancel()
+        # Runs after any batch still on the writer thread
+        await loop.run_in_executor(writer, checkpoint.flush)
+        writer.shutdown()
+        elapsed = time.perf_counter() - started
+        print(
+            f"{written} messages written in {elapsed:.1f}s "
+            f"({written / elapsed if elapsed else 0:.0f}/s)"
+        )
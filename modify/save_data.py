@@ -1,12 +1,18 @@
 import logging
-from datetime import datetime
+import sys
+from datetime import datetime, timezone
 
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from telethon import TelegramClient
 
-from db_data import get_data
+from bulk_writer import INSERTED, BulkWriter
+from checkpoints import Checkpoint
+from dead_letters import DeadLetters
+from db_data import parse_text
+from rollups import ensure_indexes, rollup_updates
 from secret import *
 from log import add_log
+from pipeline import run_pipeline
 
 # --- Configure logger ---
 logging.basicConfig(
@@ -20,60 +26,119 @@ logger = logging.getLogger(__name__)
 mongo_client = MongoClient("mongodb://localhost:27017/")
 db = mongo_client["bazarbin_data"]
 collection = db["prices"]
+rollups = db["rollups"]
+checkpoints = db["checkpoints"]
+dead_letters = DeadLetters(db["dead_letters"])
+
 
 # --- Telethon client ---
-if PROXY_SERVER and PROXY_PORT:
-    client = TelegramClient(
-        "scraper", API_ID, API_HASH, proxy=("socks5", PROXY_SERVER, int(PROXY_PORT))
-    )
-else:
-    client = TelegramClient("scraper", API_ID, API_HASH)
+def make_client(session="scraper"):
+    """Telethon client; building one creates ``<session>.session``, so not at import."""
+    if PROXY_SERVER and PROXY_PORT:
+        return TelegramClient(
+            session, API_ID, API_HASH, proxy=("socks5", PROXY_SERVER, int(PROXY_PORT))
+        )
+    return TelegramClient(session, API_ID, API_HASH)
+
+
+def report(message_id, status, doc):
+    if status == INSERTED:
+        for op in rollup_updates(doc):
+            rollup_writer.add(op)
+    logger.info(f"{message_id} - {status}")
+    print(f"{message_id} - {status}")
+
+
+# One unordered bulk_write per batch instead of round trips per message
+price_writer = BulkWriter(collection, on_result=report)
+rollup_writer = BulkWriter(rollups, size=2000)
 
 
-async def main():
+def flush_writes():
+    price_writer.flush()
+    rollup_writer.flush()
+
+
+async def main(client):
     await client.start()
+    ensure_indexes(rollups)
+    await sync(client, full="--full" in sys.argv[1:])
+
 
+async def sync(client, full=False):
+    """Save every message after the checkpoint (all of them with ``full``)."""
     # Get channel entity
     channel = await client.get_entity(CHANNEL_USERNAME)  # or channel ID
 
-    async for message in client.iter_messages(channel, limit=None):
-        msg = message.text
-        if not msg:
-            t = f"Ignored - {message.id}"
-            logger.info(t)
-            add_log(t)
-            continue
-        if msg.startswith("دلار (USD)") or msg.startswith("USDT (تتر)"):
-            data_dict = get_data(msg)
-            dt = datetime.fromisoformat(str(message.date))
-            start = dt.replace(second=0, microsecond=0)
-            end = start.replace(second=59, microsecond=999999)
-
-            # Query range: match any timestamp in that minute
-            query = {"timestamp": {"$gte": start, "$lte": end}}
-
-            # Try to update existing document
-            update_result = collection.update_one(
-                query, {"$set": {"message_id": f"{message.id}"}}
-            )
-
-            # If no document matched, insert a new one
-            if update_result.matched_count == 0:
-                data_dict["message_id"] = f"{message.id}"
-                data_dict["timestamp"] = dt
-                result = collection.insert_one(data_dict)
-                logger.info(f"{message.id} - status={result.acknowledged}")
-                print(f"{message.id} - status={result.acknowledged}")
-            else:
-                logger.info(f"{message.id} - result={update_result.modified_count}")
-                print(f"{message.id} - result={update_result.modified_count}")
-        else:
-            t = f"Ignored - {message.id}"
-            logger.info(t)
-            add_log(t)
-
-    print("All messages saved to MongoDB.")
-
-
-with client:
-    client.loop.run_until_complete(main())
+    # Oldest first from the checkpoint
+    checkpoint = Checkpoint(checkpoints, CHANNEL_USERNAME, before_flush=flush_writes)
+    min_id = 0 if full else checkpoint.last_id
+    print(f"Reading {CHANNEL_USERNAME} after message {min_id}")
+    messages = client.iter_messages(channel, min_id=min_id, reverse=True)
+    await run_pipeline(
+        messages, checkpoint, parse_text, write_message, on_error=dead_letter
+    )
+    print(f"All messages saved to MongoDB. Checkpoint: {checkpoint.last_id}")
+    print(f"Dead letters: {dead_letters.stats()}")
+
+
+def save_message(message, edited=False):
+    try:
+        data_dict = parse_text(message.text)
+    except Exception as e:
+        dead_letter(message.id, message.date, message.text, e)
+        return
+    write_message(message.id, message.date, data_dict, edited)
+
+
+def dead_letter(message_id, date, text, error):
+    dead_letters.add(CHANNEL_USERNAME, message_id, date, text, error)
+    t = f"Dead letter - {message_id}: {error}"
+    logger.info(t)
+    add_log(t)
+
+
+def write_message(message_id, date, data_dict, edited=False):
+    if data_dict is None:
+        t = f"Ignored - {message_id}"
+        logger.info(t)
+        add_log(t)
+        return
+    dt = datetime.fromisoformat(str(date))
+    start = dt.replace(second=0, microsecond=0)
+    end = start.replace(second=59, microsecond=999999)
+
+    # Query range: match any timestamp in that minute
+    query = {"timestamp": {"$gte": start, "$lte": end}}
+
+    # Point an existing snapshot of that minute at this message, or
+    # insert one. An edited message also overwrites the prices and bumps
+    # ``updated``, which keys the bot's render cache.
+    prices = {k: v for k, v in data_dict.items() if k != "timestamp"}
+    data_dict["timestamp"] = dt
+    if edited:
+        update = {
+            "$set": {
+                **prices,
+                "message_id": f"{message_id}",
+                "updated": datetime.now(timezone.utc),
+            },
+            "$setOnInsert": {"timestamp": dt},
+        }
+    else:
+        update = {
+            "$set": {"message_id": f"{message_id}"},
+            "$setOnInsert": data_dict,
+        }
+    price_writer.add(
+        UpdateOne(query, update, upsert=True),
+        tag=message_id,
+        key=start,
+        payload={**data_dict, "message_id": f"{message_id}"},
+    )
+
+
+if __name__ == "__main__":
+    client = make_client()
+    with client:
+        client.loop.run_until_complete(main(client))
@@ -1,36 +1,20 @@
-import ast
 import logging
-from datetime import datetime
+import sys
+from datetime import datetime, timezone
 
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from telethon import TelegramClient
 
-from db_data import to_int, get_data_dict
+from bulk_writer import INSERTED, MATCHED, SUPERSEDED, BulkWriter
+from checkpoints import Checkpoint
+from dead_letters import DeadLetters
+from db_data import parse_json_text
 from log import add_log
+from minute_buckets import MinuteBuckets
+from pipeline import run_pipeline
+from rollups import ensure_indexes, rollup_updates
 from secret import *
 
-usd_dict = {
-    "صداقت": "sedaghat",
-    "سبزه": "sabze",
-    "تهران": "tehran",
-    "بن بست": "bonbast",
-    "بن\u200cبست": "bonbast",
-}
-gold_dict = {
-    "اونس طلا": "ounce",
-    "مظنه بازار تهران": "tehran_market_price",
-    "طلای 18 عیار": "18_karat_gold",
-    "سکه قدیم": "old_coin",
-    "سکه جدید": "new_coin",
-}
-coin_dict = {
-    "بیت\u200cکوین": "btc",
-    "اتر": "eth",
-    "ماتیک": "pol",
-    "فانتوم": "ftm",
-    "مونرو": "xmr",
-}
-
 # --- Configure logger ---
 logging.basicConfig(
     filename="../scraper.log",  # log file name
@@ -43,88 +27,126 @@ logger = logging.getLogger(__name__)
 mongo_client = MongoClient("mongodb://localhost:27017/")
 db = mongo_client["bazarbin_data"]
 collection = db["prices"]
+rollups = db["rollups"]
+checkpoints = db["checkpoints"]
+dead_letters = DeadLetters(db["dead_letters"])
+
 
 # --- Telethon client ---
-if PROXY_SERVER and PROXY_PORT:
-    client = TelegramClient(
-        "scraper", API_ID, API_HASH, proxy=("socks5", PROXY_SERVER, int(PROXY_PORT))
-    )
-else:
-    client = TelegramClient("scraper", API_ID, API_HASH)
+def make_client(session="scraper"):
+    """Telethon client; building one creates ``<session>.session``, so not at import."""
+    if PROXY_SERVER and PROXY_PORT:
+        return TelegramClient(
+            session, API_ID, API_HASH, proxy=("socks5", PROXY_SERVER, int(PROXY_PORT))
+        )
+    return TelegramClient(session, API_ID, API_HASH)
+
+
+def report(message_id, status, doc):
+    if status == INSERTED:
+        for op in rollup_updates(doc):
+            rollup_writer.add(op)
+    elif status not in (MATCHED, SUPERSEDED):
+        # The write failed, let a later message of that minute try again
+        minutes.discard(doc["timestamp"])
+    logger.info(f"{message_id} - {status}")
+    print(f"{message_id} - {status}")
+
+
+# One unordered bulk_write per batch instead of round trips per message
+price_writer = BulkWriter(collection, on_result=report)
+rollup_writer = BulkWriter(rollups, size=2000)
+# Minutes already in the collection, checked locally instead of by a write
+minutes = MinuteBuckets(collection)
 
 
-async def main():
+def flush_writes():
+    price_writer.flush()
+    rollup_writer.flush()
+
+
+async def main(client):
     await client.start()
+    ensure_indexes(rollups)
+    await sync(client, full="--full" in sys.argv[1:])
 
+
+async def sync(client, full=False):
+    """Save every message after the checkpoint (all of them with ``full``)."""
     # Get channel entity
     channel = await client.get_entity(CHANNEL_JSON)  # or channel ID
 
-    async for message in client.iter_messages(channel, limit=None):
-        msg = message.text
-        if not msg:
-            t = f"Ignored - {message.id}"
-            logger.info(t)
-            add_log(t)
-            continue
-        if msg.startswith("{"):
-            the_data = ast.literal_eval(msg)
-            data_dict = get_json_data(the_data)
-            dt = datetime.fromisoformat(str(message.date))
-            start = dt.replace(second=0, microsecond=0)
-            end = start.replace(second=59, microsecond=999999)
-
-            # Query range: match any timestamp in that minute
-            query = {"timestamp": {"$gte": start, "$lte": end}}
-
-            existing_doc = collection.find_one(query)
-
-            if not existing_doc:
-                data_dict["timestamp"] = dt
-                result = collection.insert_one(data_dict)
-                logger.info(f"{message.id} - status={result.acknowledged}")
-                print(f"{message.id} - status={result.acknowledged}")
-            else:
-                print("exists")
-        else:
-            t = f"Ignored - {message.id}"
-            logger.info(t)
-            add_log(t)
-
-    print("All messages saved to MongoDB.")
-
-
-def get_json_data(the_data):
-    data_dict = get_data_dict()
-    data_dict["crypto"] = {}
-    for k, v in the_data.items():
-        if k == "USD":
-            for k1, v1 in v.items():
-                buy, sell = to_int(v1["buy"]), to_int(v1["sell"])
-                if "usd" not in data_dict["currency_rates"]:
-                    data_dict["currency_rates"]["usd"] = {}
-                data_dict["currency_rates"]["usd"].update(
-                    {usd_dict[k1]: {"buy": buy, "sell": sell}}
-                )
-        elif k == "USDT":
-            for k1, v1 in v.items():
-                bid, ask = to_int(v1["buy"]), to_int(v1["sell"])
-                if k1.lower() in data_dict["currency_rates"]["usdt"]:
-                    data_dict["currency_rates"]["usdt"][k1.lower()] = {
-                        "ask": ask,
-                        "bid": bid,
-                    }
-        elif k == "GOLD":
-            for k1, v1 in v.items():
-                price = to_int(v1["price"].replace("$", ""))
-                data_dict["gold_prices"]["tala.ir"].update(
-                    {gold_dict[k1]: {"price": price}}
-                )
-        elif k == "Cryptocurrency":
-            for k1, v1 in v.items():
-                price = to_int(v1["price"])
-                data_dict["crypto"].update({coin_dict[k1]: {"price": price}})
-    return data_dict
-
-
-with client:
-    client.loop.run_until_complete(main())
+    # Oldest first from the checkpoint
+    checkpoint = Checkpoint(checkpoints, CHANNEL_JSON, before_flush=flush_writes)
+    min_id = 0 if full else checkpoint.last_id
+    print(f"Reading {CHANNEL_JSON} after message {min_id}")
+    messages = client.iter_messages(channel, min_id=min_id, reverse=True)
+    await run_pipeline(
+        messages,
+        checkpoint,
+        parse_json_text,
+        write_message,
+        on_error=dead_letter,
+    )
+    print(f"All messages saved to MongoDB. Checkpoint: {checkpoint.last_id}")
+    print(f"Minute buckets: {minutes.stats()}")
+    print(f"Dead letters: {dead_letters.stats()}")
+
+
+def save_message(message, edited=False):
+    try:
+        data_dict = parse_json_text(message.text)
+    except Exception as e:
+        dead_letter(message.id, message.date, message.text, e)
+        return
+    write_message(message.id, message.date, data_dict, edited)
+
+
+def dead_letter(message_id, date, text, error):
+    dead_letters.add(CHANNEL_JSON, message_id, date, text, error)
+    t = f"Dead letter - {message_id}: {error}"
+    logger.info(t)
+    add_log(t)
+
+
+def write_message(message_id, date, data_dict, edited=False):
+    if data_dict is None:
+        t = f"Ignored - {message_id}"
+        logger.info(t)
+        add_log(t)
+        return
+    dt = datetime.fromisoformat(str(date))
+    if not edited and dt in minutes:
+        report(message_id, MATCHED, data_dict)
+        return
+    minutes.add(dt)
+    start = dt.replace(second=0, microsecond=0)
+    end = start.replace(second=59, microsecond=999999)
+
+    # Query range: match any timestamp in that minute
+    query = {"timestamp": {"$gte": start, "$lte": end}}
+
+    # Insert unless a snapshot of that minute already exists; an edited
+    # message overwrites its prices and bumps ``updated``, which keys the
+    # bot's render cache
+    prices = {k: v for k, v in data_dict.items() if k != "timestamp"}
+    data_dict["timestamp"] = dt
+    if edited:
+        update = {
+            "$set": {**prices, "updated": datetime.now(timezone.utc)},
+            "$setOnInsert": {"timestamp": dt},
+        }
+    else:
+        update = {"$setOnInsert": data_dict}
+    price_writer.add(
+        UpdateOne(query, update, upsert=True),
+        tag=message_id,
+        key=start,
+        payload=data_dict,
+    )
+
+
+if __name__ == "__main__":
+    client = make_client()
+    with client:
+        client.loop.run_until_complete(main(client))
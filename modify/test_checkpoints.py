@@ -0,0 +1,72 @@
+"""
+Checkpoint / BulkWriter tests against in-memory stand-ins for the
+collections; no MongoDB needed.
+
+    python test_checkpoints.py    (or pytest)
+"""
+
+from types import SimpleNamespace
+
+from bulk_writer import BulkWriter
+from checkpoints import Checkpoint
+
+
+class FakeCheckpoints:
+    def __init__(self, last_id=0):
+        self.docs = {"chan": {"_id": "chan", "last_id": last_id}}
+
+    def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["_id"], {"_id": query["_id"], "last_id": 0})
+        doc["last_id"] = max(doc["last_id"], update["$max"]["last_id"])
+
+
+class FakePrices:
+    def __init__(self):
+        self.written = []
+
+    def bulk_write(self, ops, ordered=True):
+        self.written.extend(ops)
+        return SimpleNamespace(upserted_ids={})
+
+
+def test_rescan_with_unchanged_checkpoint_writes_buffered_ops():
+    prices = FakePrices()
+    writer = BulkWriter(prices)
+    checkpoint = Checkpoint(FakeCheckpoints(500), "chan", before_flush=writer.flush)
+    # A --full re-scan: every id is at or below the saved checkpoint
+    for message_id in range(1, 11):
+        writer.add(f"op{message_id}", tag=message_id)
+        checkpoint.advance(message_id)
+    checkpoint.flush()
+    assert checkpoint.last_id == 500
+    assert prices.written == [f"op{i}" for i in range(1, 11)]
+    assert writer.stats()["pending"] == 0
+
+
+def test_flush_writes_before_moving_the_checkpoint():
+    prices = FakePrices()
+    writer = BulkWriter(prices)
+    checkpoints = FakeCheckpoints(0)
+    order = []
+    checkpoints.update_one = lambda *a, **k: order.append(("checkpoint", a))
+
+    def flush_writes():
+        order.append(("writes", len(writer._pending)))
+        writer.flush()
+
+    checkpoint = Checkpoint(checkpoints, "chan", before_flush=flush_writes)
+    writer.add("op1", tag=1)
+    checkpoint.advance(1)
+    checkpoint.flush()
+    assert [kind for kind, _ in order] == ["writes", "checkpoint"]
+    assert prices.written == ["op1"]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
@@ -0,0 +1,36 @@
+"""
+get_data tests on hand-written CHANNEL_USERNAME posts; no network or
+MongoDB needed.
+
+    python test_db_data.py    (or pytest)
+"""
+
+from db_data import get_data
+
+CRYPTO = [
+    "رمز ارز (Cryptocurrency)",
+    "[بیت‌کوین](https://www.binance.com/en/trade/BTCUSDT): $100000",
+    "[اتر](https://www.binance.com/en/trade/ETHUSDT): $3500.5",
+]
+
+
+def post(date_line):
+    return "\n".join([*CRYPTO, date_line])
+
+
+def test_date_line_closes_the_crypto_section():
+    for date_line in ("1404/08/19 12:35", "1404-08-19 12:35", "1404 08 19"):
+        crypto = get_data(post(date_line))["crypto"]
+        assert crypto["btc"] == {"price": 100000}, date_line
+        assert crypto["eth"] == {"price": 3500.5}, date_line
+
+
+def test_post_cut_before_the_date_line_has_no_crypto():
+    assert "btc" not in get_data("\n".join(CRYPTO))["crypto"]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
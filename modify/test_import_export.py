@@ -0,0 +1,32 @@
+"""
+Telegram Desktop export decoding tests; no network or MongoDB needed.
+
+    python test_import_export.py    (or pytest)
+"""
+
+from datetime import datetime, timezone
+
+from import_export import export_date
+
+
+def test_unixtime_is_utc():
+    message = {"date": "2025-11-10T12:05:00", "date_unixtime": "1762765500"}
+    assert export_date(message) == datetime(2025, 11, 10, 9, 5, tzinfo=timezone.utc)
+
+
+def test_local_date_is_tehran_time():
+    # +03:30 since Iran dropped daylight saving time
+    assert export_date({"date": "2025-11-10T12:05:00"}) == datetime(
+        2025, 11, 10, 8, 35, tzinfo=timezone.utc
+    )
+    # +04:30 under the old daylight saving time
+    assert export_date({"date": "2021-07-01T12:05:00"}) == datetime(
+        2021, 7, 1, 7, 35, tzinfo=timezone.utc
+    )
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
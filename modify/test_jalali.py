@@ -0,0 +1,48 @@
+"""
+Tehran time tests against pytz's public API; no network needed.
+
+    python test_jalali.py    (or pytest)
+"""
+
+from datetime import timedelta
+
+import jdatetime
+
+from jalali import (
+    FIXED_SINCE_UTC,
+    TEHRAN_OFFSET,
+    localize_tehran,
+    tehran_to_utc,
+    tehran_tz,
+    utc_to_tehran,
+)
+
+
+def test_fixed_offset_starts_at_the_last_transition():
+    before = FIXED_SINCE_UTC - timedelta(seconds=1)
+    assert tehran_tz.fromutc(before).utcoffset() == TEHRAN_OFFSET + timedelta(hours=1)
+    for days in (0, 1, 365, 20 * 365):
+        after = FIXED_SINCE_UTC + timedelta(days=days)
+        assert tehran_tz.fromutc(after).utcoffset() == TEHRAN_OFFSET
+    local = utc_to_tehran(FIXED_SINCE_UTC)
+    assert jdatetime.date.fromgregorian(date=local.date()) == jdatetime.date(
+        1401, 6, 30
+    )
+
+
+def test_round_trip_across_the_transition():
+    for minutes in range(-180, 181, 15):
+        utc = FIXED_SINCE_UTC + timedelta(minutes=minutes)
+        local = utc_to_tehran(utc)
+        assert local == tehran_tz.fromutc(utc)
+        # 23:00-24:00 local ran twice; naive times read as the second run
+        if not -60 <= minutes < 0:
+            assert tehran_to_utc(local.replace(tzinfo=None)) == utc
+            assert localize_tehran(local.replace(tzinfo=None)) == local
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
@@ -0,0 +1,34 @@
+"""
+parse_many tests against a frozen reference time; no network needed.
+
+    python test_parse_many.py    (or pytest)
+"""
+
+from datetime import datetime
+
+from jalali import localize_tehran
+from parsers import INVALID_FORMAT, OUT_OF_RANGE, parse_many
+
+NOW = localize_tehran(datetime(2025, 11, 10, 12, 0))
+
+
+def test_overflowing_inputs_are_per_item_errors():
+    inputs = ["14040819 12:35", "-9999999999d", "/M8638484w2625", "-2h", "abc"]
+    results, errors = parse_many(inputs, NOW)
+    assert results[0] == localize_tehran(datetime(2025, 11, 10, 12, 35))
+    assert results[3] == localize_tehran(datetime(2025, 11, 10, 10, 0))
+    assert results[1] is results[2] is results[4] is None
+    assert errors == [None, OUT_OF_RANGE, OUT_OF_RANGE, None, INVALID_FORMAT]
+
+
+def test_identical_inputs_share_one_result():
+    results, errors = parse_many(["-1d", "-1d", "-9999999999d"], NOW)
+    assert results[0] == results[1] == localize_tehran(datetime(2025, 11, 9))
+    assert errors == [None, None, OUT_OF_RANGE]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
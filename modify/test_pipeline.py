@@ -0,0 +1,135 @@
+"""
+run_pipeline / scraper sync tests with a fake Telethon client and
+in-memory collections; no network or MongoDB needed.
+
+    python test_pipeline.py    (or pytest)
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import save_data
+from bulk_writer import BulkWriter
+from checkpoints import Checkpoint
+from db_data import parse_text
+from dead_letters import DeadLetters
+from pipeline import parse_pool, run_pipeline
+from test_checkpoints import FakeCheckpoints, FakePrices
+
+GOOD_POST = "\n".join(
+    [
+        "دلار (USD)",
+        "[سایت tgju (آزاد)](https://www.tgju.org/): 100,000",
+        "USDT (تتر)",
+        "[Wallex](https://wallex.ir/): 101,000|102,000",
+        "طلا (GOLD) (بر اساس tala.ir)",
+    ]
+)
+# The USDT row has no [exchange] link, so get_data raises for it
+BAD_POST = GOOD_POST.replace("[Wallex](https://wallex.ir/)", "Wallex")
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def channel(bad_ids, count=9):
+    return [
+        SimpleNamespace(
+            id=i,
+            date=START + timedelta(minutes=i),
+            text=BAD_POST if i in bad_ids else GOOD_POST,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+class FakeClient:
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def get_entity(self, name):
+        return name
+
+    async def iter_messages(self, entity, min_id=0, reverse=True):
+        for message in self.messages:
+            if message.id > min_id:
+                yield message
+
+
+class FakeDeadLetters:
+    def __init__(self):
+        self.docs = {}
+
+    def update_one(self, query, update, upsert=False):
+        self.docs[query["_id"]] = update["$set"]
+
+
+def test_bad_post_in_the_middle_is_dead_lettered():
+    prices, dead = FakePrices(), FakeDeadLetters()
+    save_data.price_writer = BulkWriter(prices)
+    save_data.rollup_writer = BulkWriter(FakePrices())
+    save_data.checkpoints = FakeCheckpoints(0)
+    save_data.checkpoints.docs = {}
+    save_data.dead_letters = DeadLetters(dead)
+
+    asyncio.run(save_data.sync(FakeClient(channel({5}))))
+
+    assert list(dead.docs) == [f"{save_data.CHANNEL_USERNAME}:5"]
+    assert "ValueError" in dead.docs[f"{save_data.CHANNEL_USERNAME}:5"]["error"]
+    written = sorted(int(op._doc["$set"]["message_id"]) for op in prices.written)
+    assert written == [1, 2, 3, 4, 6, 7, 8, 9]
+    assert save_data.checkpoints.docs[save_data.CHANNEL_USERNAME]["last_id"] == 9
+
+
+def test_without_on_error_the_run_stops_before_the_bad_post():
+    checkpoint = Checkpoint(FakeCheckpoints(0), "chan")
+    written = []
+
+    async def messages():
+        for message in channel({5}):
+            yield message
+
+    try:
+        asyncio.run(
+            run_pipeline(
+                messages(),
+                checkpoint,
+                parse_text,
+                lambda message_id, date, data: written.append(message_id),
+            )
+        )
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("the bad post did not stop the run")
+    assert checkpoint.last_id < 5
+    assert 5 not in written
+
+
+def test_runs_share_one_parse_pool():
+    async def messages():
+        for message in channel(set(), count=3):
+            yield message
+
+    pools = []
+    for _ in range(2):
+        written = []
+        asyncio.run(
+            run_pipeline(
+                messages(),
+                Checkpoint(FakeCheckpoints(0), "chan"),
+                parse_text,
+                lambda message_id, date, data: written.append(message_id),
+                workers=2,
+            )
+        )
+        assert written == [1, 2, 3]
+        pools.append(parse_pool(2))
+    assert pools[0] is pools[1]
+    assert pools[0]._mp_context.get_start_method() != "fork"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
@@ -0,0 +1,121 @@
+"""
+rebuild_rollups / rebuild_buckets tests against an in-memory prices
+collection; no MongoDB needed.
+
+    python test_rollups.py    (or pytest)
+"""
+
+from datetime import datetime, timedelta
+
+from rollups import bucket_start, rebuild_buckets, rebuild_rollups
+
+# A Saturday 00:00 in Tehran
+WEEK = datetime(2025, 1, 3, 20, 30)
+
+
+class FakePrices:
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        bounds = query["timestamp"]
+        docs = [
+            doc
+            for doc in self.docs
+            if doc["timestamp"] >= bounds.get("$gte", doc["timestamp"])
+            and doc["timestamp"] < bounds.get("$lt", doc["timestamp"] + timedelta(1))
+        ]
+        return FakeCursor(docs)
+
+
+class FakeCursor(list):
+    def sort(self, key, direction):
+        return FakeCursor(sorted(self, key=lambda doc: doc[key]))
+
+
+class FakeRollups:
+    def __init__(self):
+        self.docs = {}
+        self.written = []
+
+    def bulk_write(self, ops, ordered=True):
+        for op in ops:
+            doc = op._doc
+            self.docs[(doc["instrument"], doc["resolution"], doc["start"])] = doc
+            self.written.append(doc)
+
+    def find(self, query, projection=None):
+        bounds = query["start"]
+        return FakeCursor(
+            doc
+            for doc in self.docs.values()
+            if doc["resolution"] == query["resolution"]
+            and bounds["$gte"] <= doc["start"] < bounds["$lt"]
+        )
+
+    def delete_many(self, query):
+        for key, doc in list(self.docs.items()):
+            if (
+                doc["resolution"] == query["resolution"]
+                and doc["start"] == query["start"]
+                and doc["instrument"] not in query["instrument"]["$nin"]
+            ):
+                del self.docs[key]
+
+
+def snapshot(ts, price):
+    return {"timestamp": ts, "crypto": {"btc": {"price": price}}}
+
+
+def two_weeks():
+    return [snapshot(WEEK + timedelta(hours=h), float(h)) for h in range(0, 14 * 24, 5)]
+
+
+def test_until_stops_at_the_end_of_its_week():
+    prices = FakePrices(two_weeks())
+    rollups = FakeRollups()
+    count = rebuild_rollups(prices, rollups, WEEK, WEEK + timedelta(days=3))
+    assert prices.queries[0]["timestamp"] == {
+        "$gte": WEEK,
+        "$lt": WEEK + timedelta(weeks=1),
+    }
+    assert count == len(
+        [d for d in prices.docs if d["timestamp"] < WEEK + timedelta(weeks=1)]
+    )
+    assert {b["start"] for b in rollups.written if b["resolution"] == "1w"} == {WEEK}
+
+
+def test_an_edit_rebuilds_its_buckets_from_one_day():
+    docs = two_weeks()
+    prices = FakePrices(docs)
+    rollups = FakeRollups()
+    rebuild_rollups(prices, rollups)
+    # The edited snapshot now has a new price
+    edited = WEEK + timedelta(days=2, hours=12)
+    docs[docs.index(snapshot(edited, 60.0))] = snapshot(edited, 1000.0)
+    prices.queries.clear()
+    rollups.written.clear()
+
+    rebuild_buckets(prices, rollups, edited)
+
+    day = bucket_start(edited, "1d")
+    assert prices.queries == [
+        {"timestamp": {"$gte": day, "$lt": day + timedelta(days=1)}}
+    ]
+    assert {(b["resolution"], b["start"]) for b in rollups.written} == {
+        (resolution, bucket_start(edited, resolution))
+        for resolution in ("1h", "1d", "1w")
+    }
+    expected = FakeRollups()
+    rebuild_rollups(FakePrices(docs), expected)
+    assert rollups.docs == expected.docs
+    assert rollups.docs[("crypto.btc.price", "1w", WEEK)]["high"] == 1000.0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
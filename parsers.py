@@ -1,77 +1,349 @@
 import datetime
+import re
+from collections import namedtuple
 from datetime import datetime as dt, timedelta
 
-import jdatetime
-import pytz
 from dateutil.relativedelta import relativedelta
 
-tehran_tz = pytz.timezone("Asia/Tehran")
+from jalali import jalali_to_gregorian, localize_tehran, tehran_tz
+from lru import LRUCache
+
+PERSIAN_TO_ENGLISH = str.maketrans("۰۱۲۳۴۵۶۷۸۹", "0123456789")
+ENGLISH_TO_PERSIAN = str.maketrans("0123456789", "۰۱۲۳۴۵۶۷۸۹")
+
+INVALID_FORMAT = "❌ فرمت معتبر نیست."
+OUT_OF_RANGE = "❌ تاریخ خارج از بازه مجاز است."
+AMBIGUOUS_DATE = "❌ تاریخ ابهام دارد. لطفا از - یا / بین اجزای تاریخ اسفاده کنید."
+AMBIGUOUS_TIME = "❌ ساعت ابهام دارد. لطفا از : بین اجزای تاریخ اسفاده کنید."
+
+# A maximal run of signs and digits; the character after it is its unit
+NUMBER_RUN = re.compile(r"[+\-\d]+")
+SIGNED = re.compile(r"[+-]?\d+")
+INTEGER = re.compile(r"\s*[+-]?\d+\s*")
+# Any letter except the relative time units
+FOREIGN_LETTER = re.compile(r"[^\W\d_hm]")
+RELATIVE_DATE_UNIT = re.compile(r"[YyMWwDd]")
+RELATIVE_TIME_UNIT = re.compile(r"[hm]")
+
+# Nodes of a parsed expression. A node that failed to parse is kept as its
+# ValueError, raised only when evaluation reaches it, so errors surface in
+# the same order as they always have (date before time).
+AbsoluteDate = namedtuple("AbsoluteDate", "year month day")
+RelativeDate = namedtuple("RelativeDate", "years months days")
+AbsoluteTime = namedtuple("AbsoluteTime", "hour minute")
+RelativeTime = namedtuple("RelativeTime", "hours minutes")
+NOW = "now"
+
+PARSE_CACHE_SIZE = 4096
 
 
 def english_to_persian(text):
     """Convert English numbers to Persian/Farsi"""
-    persian_numbers = "۰۱۲۳۴۵۶۷۸۹"
-    english_numbers = "0123456789"
-    translation_table = str.maketrans(english_numbers, persian_numbers)
-    return text.translate(translation_table)
-
-
-def parse_date(date_str: str) -> datetime.date:
-    date_str = persian_to_english(date_str.strip())
-    date_str = date_str.replace(" ", "")
-    year, month, day = None, None, None
-    relative_date = ["Y", "y", "M", "W", "w", "D", "d", "NOW"]
-    for d in relative_date:
-        if d in date_str or date_str == "0":
-            year, month, day = parse_relative_date(date_str)
-            break
-    if not (year or month or day):
-        sep = ["/", "-", "−"]
-        for s in sep:
-            if s in date_str:
-                try:
-                    year, month, day = map(int, date_str.split(s))
-                    is_digit = "N"
-                    break
-                except ValueError:
-                    raise ValueError("❌ فرمت معتبر نیست.")
+    return text.translate(ENGLISH_TO_PERSIAN)
+
+
+def persian_to_english(text):
+    """Convert Persian/Farsi numbers to English"""
+    return text.translate(PERSIAN_TO_ENGLISH)
+
+
+def parse_date_and_time(input_str: str, now: dt | None = None) -> datetime.datetime:
+    """
+    Parse a string combining date and time into a datetime object.
+
+    Supported formats:
+      - Date formats: YYYYMMDD, YYYY/MM/DD, YYYY-MM-DD, YYYY MM DD, -XY-YM-ZD
+      - Time formats: HH:MM, HHMM, HH MM, -Xh-Ym, -Xh -Ym
+      - Combined: date followed by time, separated by space
+      - Time only: just the time part (uses today's date)
+
+    Examples:
+      - "14040819 12:35"
+      - "1404/08/19 -2h-10m"
+      - "-1Y-2M-3D 12:35"
+      - "12:35"
+      - "-2h-10m"
+
+    Relative parts are resolved against ``now`` (Tehran time, defaults to
+    the current time), read once per call.
+    """
+    key = " ".join(persian_to_english(input_str).split())
+    result = parse_cache.get(key)
+    if result is not None:
+        return result
+    ast = tokenize(input_str)
+    if now is None:
+        now = dt.now(tehran_tz)
+    result = evaluate(ast, now)
+    if is_absolute(ast):
+        parse_cache.put(key, result)
+    else:
+        parse_cache.bypass()
+    return result
+
+
+class ParseCache(LRUCache):
+    """
+    Bounded LRU of parsed absolute inputs keyed by the normalized input
+    (English digits, single spaces). Only inputs that resolve to the same
+    instant whatever the clock says are stored; relative ones miss and are
+    counted in ``bypassed``, so ``hit_rate`` covers absolute inputs only.
+    """
+
+    def __init__(self, maxsize=PARSE_CACHE_SIZE):
+        super().__init__(maxsize)
+        self.bypassed = 0
+
+    def bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def stats(self):
+        stats = super().stats()
+        lookups = self.hits + self.misses - self.bypassed
+        stats["bypassed"] = self.bypassed
+        stats["hit_rate"] = self.hits / lookups if lookups else 0.0
+        return stats
+
+
+parse_cache = ParseCache()
+
+
+def is_absolute(ast) -> bool:
+    """True when the expression does not depend on the current time."""
+    date_node, time_node = ast
+    return isinstance(date_node, AbsoluteDate) and (
+        time_node is None or isinstance(time_node, AbsoluteTime)
+    )
+
+
+def tokenize(input_str: str):
+    """
+    Split the input into a ``(date, time)`` pair of nodes in one pass.
+    ``date`` is NOW, None (time only) or a date node; ``time`` is None or a
+    time node.
+    """
+    input_str = persian_to_english(input_str.strip())
+    parts = input_str.split()
+
+    if len(parts) == 1 and parts[0].upper() in ("0", "NOW"):
+        return NOW, None
+    elif len(parts) == 1 and is_time(parts[0]):
+        return None, _node(read_time, input_str)
+    elif len(parts) == 2 and is_time(" ".join(parts)):
+        return None, _node(read_time, " ".join(parts))
+    elif not parts:
+        return ValueError(INVALID_FORMAT), None
+
+    time_part = " ".join(parts[1:])
+    time_node = _node(read_time, time_part) if time_part else None
+    return _node(read_date, parts[0]), time_node
+
+
+def parse_many(inputs, now: dt | None = None):
+    """
+    Parse many inputs against one reference time.
+
+    Returns ``(results, errors)``, two lists parallel to ``inputs``: each
+    item has either a timezone-aware datetime in ``results`` or the usual
+    error message in ``errors``, the other being None. Absolute inputs go
+    through the parse cache, identical inputs are resolved once and each
+    distinct Jalali date is converted once.
+    """
+    if now is None:
+        now = dt.now(tehran_tz)
+    results = [None] * len(inputs)
+    errors = [None] * len(inputs)
+
+    # Identical inputs are resolved once
+    pending = {}
+    for i, input_str in enumerate(inputs):
+        key = " ".join(persian_to_english(input_str).split())
+        if key in pending:
+            pending[key][1].append(i)
+            continue
+        cached = parse_cache.get(key)
+        if cached is not None:
+            results[i] = cached
         else:
-            is_digit = "T" if date_str.isdigit() else "F"
+            pending[key] = (tokenize(input_str), [i])
+
+    gregorian = {}
+    for (date_node, _), _ in pending.values():
+        if isinstance(date_node, AbsoluteDate) and date_node not in gregorian:
+            gregorian[date_node] = _node(to_gregorian, *date_node)
+
+    for key, (ast, indexes) in pending.items():
+        try:
+            result, error = evaluate(ast, now, gregorian), None
+        except ValueError as e:
+            result, error = None, str(e)
+        except OverflowError:
+            # e.g. "-9999999999d", past what datetime can hold
+            result, error = None, OUT_OF_RANGE
+        for i in indexes:
+            results[i], errors[i] = result, error
+        if error is None and is_absolute(ast):
+            parse_cache.put(key, result)
+        elif error is None:
+            parse_cache.bypass()
+    return results, errors
+
+
+def evaluate(ast, now: dt, gregorian=None) -> datetime.datetime:
+    """
+    Resolve a tokenized expression. ``gregorian`` optionally maps
+    AbsoluteDate nodes to already converted dates (or their ValueError).
+    """
+    date_node, time_node = ast
+    if date_node is NOW:
+        return now - timedelta(minutes=2, seconds=30)
+    elif date_node is None:
+        return resolve_time(time_node, now)
+
+    if gregorian and date_node in gregorian:
+        date_obj = gregorian[date_node]
+        if isinstance(date_obj, ValueError):
+            raise date_obj
+    else:
+        date_obj = resolve_date(date_node, now)
+    date_obj = dt.combine(date_obj, now.time())
+    if time_node is None:
+        result = date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
+    elif isinstance(time_node, AbsoluteTime):
+        if time_node.hour > 23:
+            # Raises the same error datetime.replace always gave for 24:xx
+            resolve_time(time_node, now)
+        result = date_obj.replace(
+            hour=time_node.hour, minute=time_node.minute, second=0, microsecond=0
+        )
+    else:
+        result = date_obj + relativedelta(resolve_time(time_node, now), now)
+
+    # Add Tehran timezone
+    return localize_tehran(result)
+
+
+def _node(reader, *args):
+    try:
+        return reader(*args)
+    except ValueError as e:
+        return e
+    except OverflowError:
+        return ValueError(OUT_OF_RANGE)
+
+
+def read_date(date_str: str):
+    """Parse a date token into an AbsoluteDate or RelativeDate node."""
+    date_str = date_str.strip().replace(" ", "")
+    if date_str in ("0", "NOW"):
+        return RelativeDate(0, 0, 0)
+    if RELATIVE_DATE_UNIT.search(date_str):
+        years, months, days, weeks = get_date(date_str)
+        if years or months or days or weeks:
+            return RelativeDate(years, months, days + 7 * weeks)
+        raise ValueError(INVALID_FORMAT)
+
+    for sep in ("/", "-", "−"):
+        if sep in date_str:
+            pieces = date_str.split(sep)
+            if len(pieces) != 3 or not all(INTEGER.fullmatch(p) for p in pieces):
+                raise ValueError(INVALID_FORMAT)
+            year, month, day = map(int, pieces)
+            break
+    else:
+        if not date_str.isdigit() or len(date_str) < 6:
+            raise ValueError(INVALID_FORMAT)
+        year = int(date_str[:4])
+        month, day = parse_month_day(date_str[4:])
+    return AbsoluteDate(year, month, day)
+
+
+def read_time(time_str: str):
+    """Parse a time token into an AbsoluteTime or RelativeTime node."""
+    time_str = time_str.strip()
+    if RELATIVE_TIME_UNIT.search(time_str):
+        hours, minutes = get_time(time_str)
+        if hours or minutes:
+            return RelativeTime(hours, minutes)
+        raise ValueError(INVALID_FORMAT)
+
+    for sep in (":", " "):
+        if sep in time_str:
+            pieces = time_str.split(sep)
+            if len(pieces) != 2 or not all(INTEGER.fullmatch(p) for p in pieces):
+                raise ValueError(INVALID_FORMAT)
+            hours, minutes = map(int, pieces)
+            break
+    else:
+        if not time_str.isdigit() or len(time_str) > 5:
+            raise ValueError(INVALID_FORMAT)
+        hours, minutes = parse_hour_minute(time_str)
+
+    if 0 <= hours <= 24 and 0 <= minutes <= 59:
+        return AbsoluteTime(hours, minutes)
+    raise ValueError(INVALID_FORMAT)
+
+
+def resolve_date(node, now: dt) -> datetime.date:
+    if isinstance(node, ValueError):
+        raise node
+    if isinstance(node, RelativeDate):
+        target = now + relativedelta(
+            years=node.years, months=node.months, days=node.days
+        )
+        return to_gregorian(target.year, target.month, target.day)
+    return to_gregorian(node.year, node.month, node.day)
 
-        if is_digit == "F" or (is_digit == "T" and len(date_str) < 6):
-            raise ValueError("❌ فرمت معتبر نیست.")
-        elif is_digit == "T":
-            year = int(date_str[:4])
-            month, day = parse_month_day(date_str[4:])
 
+def resolve_time(node, now: dt) -> dt:
+    if isinstance(node, ValueError):
+        raise node
+    if isinstance(node, RelativeTime):
+        return now + relativedelta(hours=node.hours, minutes=node.minutes)
+    return now.replace(hour=node.hour, minute=node.minute)
+
+
+def to_gregorian(year: int, month: int, day: int) -> datetime.date:
     if 1394 < year < 1425 and 0 < month < 13 and 0 < day < 32:
-        jdate = jdatetime.date(year, month, day).togregorian()
-        return jdate
+        return jalali_to_gregorian(year, month, day)
     elif 2014 < year < 2045 and 0 < month < 13 and 0 < day < 32:
-        date_obj = dt(year, month, day).date()
-        return date_obj
+        return datetime.date(year, month, day)
     else:
-        raise ValueError("❌ تاریخ خارج از بازه مجاز است.")
+        raise ValueError(OUT_OF_RANGE)
 
 
-def persian_to_english(text):
-    """Convert Persian/Farsi numbers to English"""
-    persian_numbers = "۰۱۲۳۴۵۶۷۸۹"
-    english_numbers = "0123456789"
-    translation_table = str.maketrans(persian_numbers, english_numbers)
-    return text.translate(translation_table)
+def parse_date(date_str: str, now: dt | None = None) -> datetime.date:
+    if now is None:
+        now = dt.now(tehran_tz)
+    return resolve_date(read_date(persian_to_english(date_str)), now)
+
+
+def parse_time(time_str: str, now: dt | None = None) -> dt:
+    """
+    Parse time string and return a datetime with that clock time.
+    Supports formats:
+      - HH:MM (e.g., "12:35")
+      - HHMM (e.g., "1235")
+      - HH MM (e.g., "12 35")
+      - -Xh-Ym (relative time, e.g., "-2h-10m")
+      - -Xh -Ym (relative time with space, e.g., "-2h -10m")
+    """
+    if now is None:
+        now = dt.now(tehran_tz)
+    return resolve_time(read_time(persian_to_english(time_str)), now)
 
 
-def parse_relative_date(s: str):
+def parse_relative_date(s: str, now: dt | None = None):
     """
     Parse a string like '15D2Y34M' or '39M-4Y2M' into (year, month, day) in Tehran timezone.
     Special cases:
       - '0' or 'NOW' => today's date
     Units:
-      Y = years, M = months, D = days
+      Y = years, M = months, W = weeks, D = days
     """
-    tehran = pytz.timezone("Asia/Tehran")
-    now = dt.now(tehran)
+    if now is None:
+        now = dt.now(tehran_tz)
     if s == "0" or s == "NOW":
         return now.year, now.month, now.day
     years, months, days, weeks = get_date(s)
@@ -81,7 +353,7 @@ def parse_relative_date(s: str):
         target = now + delta
         return target.year, target.month, target.day
     else:
-        raise ValueError("❌ فرمت معتبر نیست.")
+        raise ValueError(INVALID_FORMAT)
 
 
 def parse_month_day(month_day: str):
@@ -108,199 +380,83 @@ def parse_month_day(month_day: str):
         elif valid_m2 and not valid_m1:
             month, day = m2, d2
         else:
-            raise ValueError(
-                "❌ تاریخ ابهام دارد. لطفا از - یا / بین اجزای تاریخ اسفاده کنید."
-            )
+            raise ValueError(AMBIGUOUS_DATE)
     elif len(month_day) == 2:  # MD
         month = int(month_day[0])
         day = int(month_day[1])
     else:
-        raise ValueError("❌ فرمت معتبر نیست.")
+        raise ValueError(INVALID_FORMAT)
 
     return month, day
 
 
 def get_date(s: str):
-    num = ""
+    """Sum the signed Y/M/W/D amounts in a relative date like '-1Y+2M-3D'."""
     years = months = days = weeks = 0
-    for ch in s:
-        if ch in ["-", "+"]:
-            num += ch
-        elif ch.isdigit():
-            num += ch
-        else:
-            if not num or num in ["-", "+"]:
-                continue
-            value = int(num)
-            if ch == "Y" or ch == "y":
-                years += value
-            elif ch == "W" or ch == "w":
-                weeks += value
-            elif ch == "M":
-                months += value
-            elif ch == "D" or ch == "d":
-                days += value
-            num = ""  # reset
+    carry = ""
+    for match in NUMBER_RUN.finditer(s):
+        end = match.end()
+        if end == len(s):
+            break
+        num = carry + match.group()
+        if num in ("-", "+"):
+            # A bare sign sticks to the next number
+            carry = num
+            continue
+        carry = ""
+        if not SIGNED.fullmatch(num):
+            raise ValueError(INVALID_FORMAT)
+        value = int(num)
+        unit = s[end]
+        if unit == "Y" or unit == "y":
+            years += value
+        elif unit == "W" or unit == "w":
+            weeks += value
+        elif unit == "M":
+            months += value
+        elif unit == "D" or unit == "d":
+            days += value
     return years, months, days, weeks
 
 
-def parse_date_and_time(input_str: str) -> datetime.datetime:
-    """
-    Parse a string combining date and time into a datetime object.
-
-    Supported formats:
-      - Date formats: YYYYMMDD, YYYY/MM/DD, YYYY-MM-DD, YYYY MM DD, -XY-YM-ZD
-      - Time formats: HH:MM, HHMM, HH MM, -Xh-Ym, -Xh -Ym
-      - Combined: date followed by time, separated by space
-      - Time only: just the time part (uses today's date)
-
-    Examples:
-      - "14040819 12:35"
-      - "1404/08/19 -2h-10m"
-      - "-1Y-2M-3D 12:35"
-      - "12:35"
-      - "-2h-10m"
-    """
-    input_str = persian_to_english(input_str.strip())
-
-    # Split by spaces to separate date and time parts
-    parts = input_str.split()
-
-    # Check if input is time-only
-    if len(parts) == 1 and parts[0].upper() in ["0", "NOW"]:
-        return dt.now(tehran_tz) - timedelta(minutes=2, seconds=30)
-    elif len(parts) == 1 and is_time(parts[0]):
-        # Time only - use today's date
-        return parse_time(input_str)
-    elif len(parts) == 2 and is_time(" ".join(parts)):
-        # It's time-only like "12 35"
-        return parse_time(" ".join(parts))
-
-    # Not time-only, so parse as date + time
-    date_part = parts[0]
-    time_part = " ".join(parts[1:])
-    now = dt.now(tehran_tz)
-
-    date_obj = parse_date(date_part)
-    date_obj = dt.combine(date_obj, now.time())
-
-    if time_part:
-        time_obj = parse_time(time_part)
-        is_relative = is_relative_time(time_part)
-        if is_relative:
-            delta = relativedelta(time_obj, now)
-            result = date_obj + delta
-        else:
-            result = date_obj.replace(
-                hour=time_obj.hour, minute=time_obj.minute, second=0, microsecond=0
-            )
-    else:
-        result = date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-
-    # Add Tehran timezone
-    result = tehran_tz.localize(result)
-
-    return result
-
-
 def is_time(s: str) -> bool:
     # must not contain any other alphabetic characters
-    for ch in s:
-        if ch.isalpha() and ch not in ("h", "m"):
-            return False
+    if FOREIGN_LETTER.search(s):
+        return False
 
     parts = s.split()
-    if len(parts) == 1 and ("h" in parts[0] or "m" in parts[0]):
-        return True
-    elif len(parts) == 2 and ("h" in parts[0] or "m" in parts[0]):
+    if len(parts) in (1, 2) and RELATIVE_TIME_UNIT.search(parts[0]):
         return True
 
     if ":" in s and len(s.strip()) < 6:
-        try:
-            hours, minutes = map(int, s.split(":"))
-            return True
-        except ValueError:
-            return False
-
-    if len(s.replace(" ", "").strip()) < 5 and s.replace(" ", "").isdigit():
-        return True
-    return False
+        pieces = s.split(":")
+        return len(pieces) == 2 and all(INTEGER.fullmatch(p) for p in pieces)
 
-
-def parse_time(time_str: str) -> dt:
-    """
-    Parse time string and return datetime.time object.
-    Supports formats:
-      - HH:MM (e.g., "12:35")
-      - HHMM (e.g., "1235")
-      - HH MM (e.g., "12 35")
-      - -Xh-Ym (relative time, e.g., "-2h-10m")
-      - -Xh -Ym (relative time with space, e.g., "-2h -10m")
-    """
-    time_str = persian_to_english(time_str.strip())
-    hours = minutes = is_relative = dt_object = None
-
-    relative_date = ["h", "m"]
-    for d in relative_date:
-        if d in time_str:
-            dt_object = parse_relative_time(time_str)
-            hours, minutes, is_relative = dt_object.hour, dt_object.minute, True
-            break
-    if not (hours or minutes):
-        sep = [":", " "]
-        for s in sep:
-            if s in time_str:
-                try:
-                    hours, minutes = map(int, time_str.split(s))
-                    is_digit = "N"
-                except ValueError:
-                    raise ValueError("❌ فرمت معتبر نیست.")
-                break
-        else:
-            is_digit = "T" if time_str.isdigit() else "F"
-
-        if is_digit == "F" or (is_digit == "T" and len(time_str) > 5):
-            raise ValueError("❌ فرمت معتبر نیست.")
-        elif is_digit == "T":
-            hours, minutes = parse_hour_minute(time_str)
-
-    if (
-        hours is not None
-        and minutes is not None
-        and 0 <= hours <= 24
-        and 0 <= minutes <= 59
-    ):
-        if is_relative:
-            return dt_object
-        return dt.now(tehran_tz).replace(hour=hours, minute=minutes)
-    else:
-        raise ValueError("❌ فرمت معتبر نیست.")
+    compact = s.replace(" ", "")
+    return len(compact) < 5 and compact.isdigit()
 
 
 def is_relative_time(time_str):
-    relative_str = ["h", "m"]
-    for d in relative_str:
-        if d in time_str:
-            parse_relative_time(time_str)
-            return True
+    if RELATIVE_TIME_UNIT.search(time_str):
+        read_time(time_str)
+        return True
     return False
 
 
-def parse_relative_time(s: str):
+def parse_relative_time(s: str, now: dt | None = None):
     """
-    Parse a string like '-3h-5m' or '-3h+10m' into (hours, minutes) in Tehran timezone.
+    Parse a string like '-3h-5m' or '-3h+10m' into a datetime relative to now in Tehran timezone.
     Units:
       h = hours, m = minutes
     """
     hours, minutes = get_time(s)
     if hours != 0 or minutes != 0:
-        # Get current time in Tehran timezone
-        now = dt.now(tehran_tz)
+        if now is None:
+            now = dt.now(tehran_tz)
         delta = relativedelta(hours=hours, minutes=minutes)
-        target = now + delta
-        return target
+        return now + delta
     else:
-        raise ValueError("❌ فرمت معتبر نیست.")
+        raise ValueError(INVALID_FORMAT)
 
 
 def parse_hour_minute(time_str: str):
@@ -322,31 +478,30 @@ def parse_hour_minute(time_str: str):
         elif (h1, m1) == (h2, m2):
             hour, minute = h1, m1
         else:
-            raise ValueError(
-                "❌ ساعت ابهام دارد. لطفا از : بین اجزای تاریخ اسفاده کنید."
-            )
+            raise ValueError(AMBIGUOUS_TIME)
     elif 0 <= int(time_str) <= 24:
         hour, minute = int(time_str), 0
     else:
-        raise ValueError("❌ فرمت معتبر نیست.")
+        raise ValueError(INVALID_FORMAT)
     return hour, minute
 
 
 def get_time(s: str):
+    """Sum the signed h/m amounts in a relative time like '-2h+10m'."""
     s = s.replace(" ", "")
     hours = minutes = 0
-    num = ""
-    for ch in s:
-        if ch in ["-", "+"]:
-            num += ch
-        elif ch.isdigit():
-            num += ch
-        else:
-            if num and num not in ["-", "+"]:
-                value = int(num)
-                if ch == "h":
-                    hours += value
-                elif ch == "m":
-                    minutes += value
-            num = ""  # reset
+    for match in NUMBER_RUN.finditer(s):
+        end = match.end()
+        if end == len(s):
+            break
+        num = match.group()
+        if num in ("-", "+"):
+            continue
+        if not SIGNED.fullmatch(num):
+            raise ValueError(INVALID_FORMAT)
+        unit = s[end]
+        if unit == "h":
+            hours += int(num)
+        elif unit == "m":
+            minutes += int(num)
     return hours, minutes
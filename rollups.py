@@ -0,0 +1,335 @@
+"""
+Open/high/low/close rollups of every numeric price in the prices collection.
+
+One document per (instrument, resolution, start) in the ``rollups``
+collection, e.g. instrument ``currency_rates.usd.sabze.sell`` or
+``crypto.btc.price``. Buckets follow Tehran local time; weeks start on
+Saturday. ``start`` is stored as UTC like the snapshot timestamps.
+"""
+
+from datetime import datetime as dt, timedelta, timezone
+
+from pymongo import ASCENDING, ReplaceOne, UpdateOne
+
+from jalali import tehran_to_utc, utc_to_tehran
+
+RESOLUTIONS = ("1h", "1d", "1w")
+# Everything a rollup needs from a snapshot
+SNAPSHOT_FIELDS = {"_id": 0, "message_id": 0}
+SECTIONS = ("currency_rates", "gold_prices", "crypto")
+
+
+def iter_instruments(doc, prefix="", node=None):
+    """Yield ``(instrument, value)`` for every numeric price in a snapshot."""
+    if node is None:
+        for section in SECTIONS:
+            if section in doc:
+                yield from iter_instruments(doc, section, doc[section])
+        return
+    for key, value in node.items():
+        path = f"{prefix}.{key}"
+        if isinstance(value, dict):
+            yield from iter_instruments(doc, path, value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, value
+
+
+def bucket_start(timestamp: dt, resolution: str) -> dt:
+    local = utc_to_tehran(timestamp).replace(
+        minute=0, second=0, microsecond=0, tzinfo=None
+    )
+    if resolution == "1h":
+        pass
+    elif resolution == "1d":
+        local = local.replace(hour=0)
+    elif resolution == "1w":
+        # Saturday is weekday 5
+        local = local.replace(hour=0) - timedelta(days=(local.weekday() - 5) % 7)
+    else:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    return tehran_to_utc(local)
+
+
+def ensure_indexes(rollups):
+    rollups.create_index(
+        [("instrument", ASCENDING), ("resolution", ASCENDING), ("start", ASCENDING)],
+        unique=True,
+    )
+
+
+def rollup_updates(doc):
+    """
+    Upserts folding one snapshot into its buckets. Scrapers walk the channel
+    newest-first, so open/close are decided by timestamp, not arrival order.
+    """
+    ts = doc["timestamp"]
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    missing = {"$eq": [{"$type": "$open_ts"}, "missing"]}
+    updates = []
+    for resolution in RESOLUTIONS:
+        start = bucket_start(ts, resolution)
+        for instrument, value in iter_instruments(doc):
+            pipeline = [
+                {
+                    "$set": {
+                        "open": {
+                            "$cond": [
+                                {"$or": [missing, {"$lt": [ts, "$open_ts"]}]},
+                                value,
+                                "$open",
+                            ]
+                        },
+                        "close": {
+                            "$cond": [
+                                {"$or": [missing, {"$gte": [ts, "$close_ts"]}]},
+                                value,
+                                "$close",
+                            ]
+                        },
+                        "high": {"$max": ["$high", value]},
+                        "low": {"$min": ["$low", value]},
+                        "count": {"$add": [{"$ifNull": ["$count", 0]}, 1]},
+                        "open_ts": {"$min": ["$open_ts", ts]},
+                        "close_ts": {"$max": ["$close_ts", ts]},
+                    }
+                }
+            ]
+            key = {"instrument": instrument, "resolution": resolution, "start": start}
+            updates.append(UpdateOne(key, pipeline, upsert=True))
+    return updates
+
+
+def update_rollups(rollups, doc):
+    """Fold a newly inserted snapshot into the rollups in one round trip."""
+    updates = rollup_updates(doc)
+    if updates:
+        rollups.bulk_write(updates, ordered=False)
+
+
+def rebuild_rollups(prices, rollups, since=None, until=None, batch_size=1000):
+    """
+    Recompute rollups from the raw snapshots, streaming them in timestamp
+    order and writing each bucket once it is complete. ``since`` and
+    ``until`` are widened to whole weeks. Returns the number of snapshots
+    read.
+    """
+    query = {"timestamp": {"$exists": True}}
+    # Whole weeks so every rewritten bucket is complete
+    if since is not None:
+        query["timestamp"] = {"$gte": bucket_start(since, "1w")}
+    if until is not None:
+        query["timestamp"] = {
+            **query["timestamp"],
+            "$lt": next_bucket(bucket_start(until, "1w"), "1w"),
+        }
+    cursor = prices.find(query, SNAPSHOT_FIELDS).sort("timestamp", ASCENDING)
+    return _rebuild(cursor, rollups, batch_size)[0]
+
+
+def rebuild_buckets(prices, rollups, timestamp):
+    """
+    Recompute the hour, day and week containing ``timestamp``, e.g. after
+    the snapshot of that minute was edited. The hour and day are rebuilt
+    from that day's snapshots and the week from its day rollups, so about
+    a day of snapshots is read. Returns that number.
+    """
+    starts = {
+        resolution: bucket_start(timestamp, resolution) for resolution in ("1h", "1d")
+    }
+    query = {
+        "timestamp": {"$gte": starts["1d"], "$lt": next_bucket(starts["1d"], "1d")}
+    }
+    cursor = prices.find(query, SNAPSHOT_FIELDS).sort("timestamp", ASCENDING)
+    count, rebuilt = _rebuild(cursor, rollups, only=starts)
+    # Instruments the edit removed from the hour or day
+    for resolution, start in starts.items():
+        _delete_others(
+            rollups,
+            resolution,
+            start,
+            [instrument for r, instrument in rebuilt if r == resolution],
+        )
+    week = bucket_start(timestamp, "1w")
+    days = rollups.find(
+        {"resolution": "1d", "start": {"$gte": week, "$lt": next_bucket(week, "1w")}},
+        {"_id": 0},
+    ).sort("start", ASCENDING)
+    weeks = {}
+    for day in days:
+        bucket = weeks.get(day["instrument"])
+        if bucket is None:
+            weeks[day["instrument"]] = {**day, "resolution": "1w", "start": week}
+        else:
+            bucket["high"] = max(bucket["high"], day["high"])
+            bucket["low"] = min(bucket["low"], day["low"])
+            bucket["close"] = day["close"]
+            bucket["close_ts"] = day["close_ts"]
+            bucket["count"] += day["count"]
+    if weeks:
+        rollups.bulk_write(
+            [_replace(bucket) for bucket in weeks.values()], ordered=False
+        )
+    _delete_others(rollups, "1w", week, list(weeks))
+    return count
+
+
+def next_bucket(start: dt, resolution: str) -> dt:
+    """Start of the day or week after the one starting at ``start``."""
+    # Half a day past the nominal width clears any DST shift of the boundary
+    return bucket_start(
+        start + RESOLUTION_WIDTHS[resolution] + timedelta(hours=12), resolution
+    )
+
+
+def _replace(bucket):
+    key = {
+        "instrument": bucket["instrument"],
+        "resolution": bucket["resolution"],
+        "start": bucket["start"],
+    }
+    return ReplaceOne(key, bucket, upsert=True)
+
+
+def _delete_others(rollups, resolution, start, instruments):
+    rollups.delete_many(
+        {"resolution": resolution, "start": start, "instrument": {"$nin": instruments}}
+    )
+
+
+def _rebuild(cursor, rollups, batch_size=1000, only=None):
+    """
+    Write the buckets of the snapshots of ``cursor`` (sorted by timestamp);
+    ``only`` maps a resolution to the one bucket start to write. Returns the
+    number of snapshots read and the ``(resolution, instrument)`` pairs
+    written.
+    """
+    current = {}
+    writes = []
+    rebuilt = set()
+    count = 0
+
+    def flush(bucket):
+        if only is not None and only.get(bucket["resolution"]) != bucket["start"]:
+            return
+        rebuilt.add((bucket["resolution"], bucket["instrument"]))
+        writes.append(_replace(bucket))
+        if len(writes) >= batch_size:
+            rollups.bulk_write(writes, ordered=False)
+            writes.clear()
+
+    for doc in cursor:
+        count += 1
+        ts = doc["timestamp"]
+        starts = {
+            resolution: bucket_start(ts, resolution) for resolution in RESOLUTIONS
+        }
+        for instrument, value in iter_instruments(doc):
+            for resolution, start in starts.items():
+                bucket = current.get((instrument, resolution))
+                if bucket is not None and bucket["start"] != start:
+                    flush(bucket)
+                    bucket = None
+                if bucket is None:
+                    current[(instrument, resolution)] = {
+                        "instrument": instrument,
+                        "resolution": resolution,
+                        "start": start,
+                        "open": value,
+                        "high": value,
+                        "low": value,
+                        "close": value,
+                        "count": 1,
+                        "open_ts": ts,
+                        "close_ts": ts,
+                    }
+                else:
+                    bucket["high"] = max(bucket["high"], value)
+                    bucket["low"] = min(bucket["low"], value)
+                    bucket["close"] = value
+                    bucket["close_ts"] = ts
+                    bucket["count"] += 1
+
+    for bucket in current.values():
+        flush(bucket)
+    if writes:
+        rollups.bulk_write(writes, ordered=False)
+    return count, rebuilt
+
+
+RESOLUTION_WIDTHS = {
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+    "1w": timedelta(weeks=1),
+}
+INSTRUMENT_ALIASES = {
+    "usd": "currency_rates.usd.sabze.sell",
+    "usdt": "currency_rates.usdt.nobitex_150.ask",
+    "gold": "gold_prices.tala.ir.18_karat_gold.price",
+    "coin": "gold_prices.tala.ir.new_coin.price",
+    "ounce": "gold_prices.tala.ir.ounce.price",
+    "btc": "crypto.btc.price",
+    "eth": "crypto.eth.price",
+    "bnb": "crypto.bnb.price",
+}
+
+
+def resolve_instrument(name: str) -> str | None:
+    name = name.strip()
+    if name.lower() in INSTRUMENT_ALIASES:
+        return INSTRUMENT_ALIASES[name.lower()]
+    if name.split(".", 1)[0] in SECTIONS:
+        return name
+    return None
+
+
+def pick_resolution(start: dt, end: dt, points: int) -> str:
+    """Finest resolution that needs at most ``points * 8`` rollup documents."""
+    for resolution in RESOLUTIONS:
+        if (end - start) / RESOLUTION_WIDTHS[resolution] <= points * 8:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def downsample(rollups, instrument: str, start: dt, end: dt, points: int = 30):
+    """
+    Yield at most ``points`` OHLC rows covering [start, end), merged on the
+    server from the coarsest suitable rollups. Rows are streamed from the
+    aggregation cursor in time order.
+    """
+    start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    resolution = pick_resolution(start, end, points)
+    width = RESOLUTION_WIDTHS[resolution]
+    # Whole rollup buckets per output point, rounded up
+    buckets = -(-(end - start) // width)
+    step = max(1, -(-buckets // points))
+    step_ms = int(step * width.total_seconds() * 1000)
+    first = bucket_start(start, resolution)
+
+    pipeline = [
+        {
+            "$match": {
+                "instrument": instrument,
+                "resolution": resolution,
+                "start": {"$gte": first, "$lt": end},
+            }
+        },
+        {"$sort": {"start": 1}},
+        {
+            "$group": {
+                "_id": {
+                    "$floor": {"$divide": [{"$subtract": ["$start", first]}, step_ms]}
+                },
+                "start": {"$first": "$start"},
+                "open": {"$first": "$open"},
+                "high": {"$max": "$high"},
+                "low": {"$min": "$low"},
+                "close": {"$last": "$close"},
+                "count": {"$sum": "$count"},
+            }
+        },
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0}},
+    ]
+    yield from rollups.aggregate(pipeline)
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import deque
+
+BUSY = "busy"
+RATE_LIMITED = "rate_limited"
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.warned = False
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.warned = False
+            return True
+        return False
+
+
+class ChatScheduler:
+    """
+    Bounded worker pool in front of the message handlers.
+
+    Each chat has its own FIFO and token bucket; workers take one task per
+    chat in round-robin order, so a chat with a long backlog cannot starve
+    the others. ``submit`` returns None when the task was queued, otherwise
+    BUSY (global queue full) or RATE_LIMITED (chat out of tokens).
+    """
+
+    def __init__(self, workers=8, queue_size=200, rate=0.5, burst=5):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.rate = rate
+        self.burst = burst
+        self.pending = 0
+        self.completed = self.rejected_busy = self.rejected_rate = 0
+        self._queues = {}
+        self._ready = deque()
+        self._buckets = {}
+        self._cond = threading.Condition()
+        self._threads = []
+        self._pruned = time.monotonic()
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"handler-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, chat_id, func, *args):
+        with self._cond:
+            # Capacity first: a request turned away as BUSY costs no token
+            if self.pending >= self.queue_size:
+                self.rejected_busy += 1
+                return BUSY
+            bucket = self._buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._buckets[chat_id] = TokenBucket(self.rate, self.burst)
+            if not bucket.take():
+                self.rejected_rate += 1
+                return RATE_LIMITED
+            tasks = self._queues.get(chat_id)
+            if tasks is None:
+                tasks = self._queues[chat_id] = deque()
+                self._ready.append(chat_id)
+            tasks.append((func, args))
+            self.pending += 1
+            self._cond.notify()
+        return None
+
+    def should_warn(self, chat_id):
+        """True once per throttling period, so abusers get a single notice."""
+        with self._cond:
+            bucket = self._buckets.get(chat_id)
+            if bucket is None or bucket.warned:
+                return False
+            bucket.warned = True
+            return True
+
+    def _next_task(self):
+        with self._cond:
+            while not self._ready:
+                self._cond.wait()
+            chat_id = self._ready.popleft()
+            tasks = self._queues[chat_id]
+            task = tasks.popleft()
+            if tasks:
+                self._ready.append(chat_id)
+            else:
+                del self._queues[chat_id]
+            self.pending -= 1
+            self._prune_buckets()
+            return task
+
+    def _prune_buckets(self):
+        # Full buckets carry no state worth keeping
+        now = time.monotonic()
+        if len(self._buckets) < 10000 or now - self._pruned < 60:
+            return
+        self._pruned = now
+        idle = self.burst / self.rate if self.rate else 0
+        for chat_id in [c for c, b in self._buckets.items() if now - b.updated > idle]:
+            if chat_id not in self._queues:
+                del self._buckets[chat_id]
+
+    def _work(self):
+        while True:
+            func, args = self._next_task()
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Exception in ChatScheduler worker: {e}")
+            with self._cond:
+                self.completed += 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "active_chats": len(self._queues),
+                "completed": self.completed,
+                "rejected_busy": self.rejected_busy,
+                "rejected_rate": self.rejected_rate,
+            }
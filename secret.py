@@ -13,3 +13,27 @@ CHANNEL_USERNAME = os.getenv("CHANNEL_USERNAME")  # Channel username (without @)
 CHANNEL_JSON = os.getenv("CHANNEL_JSON")
 PROXY_SERVER = os.getenv("PROXY_SERVER")
 PROXY_PORT = os.getenv("PROXY_PORT")
+INDEX_REFRESH_SECONDS = int(os.getenv("INDEX_REFRESH_SECONDS", "30"))
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "64"))
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "1024"))
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # public https URL, TLS terminated upstream
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+BOT_API_URL = os.getenv("BOT_API_URL")  # e.g. http://127.0.0.1:8081/bot{0}/{1}
+HANDLER_WORKERS = int(os.getenv("HANDLER_WORKERS", "8"))
+HANDLER_QUEUE_SIZE = int(os.getenv("HANDLER_QUEUE_SIZE", "200"))
+CHAT_RATE = float(os.getenv("CHAT_RATE", "0.5"))  # requests per second per chat
+CHAT_BURST = int(os.getenv("CHAT_BURST", "5"))
+RANGE_POINTS = int(os.getenv("RANGE_POINTS", "30"))
+LOG_RATE = int(os.getenv("LOG_RATE", "20"))  # log messages per minute
+LOG_SPILL_FILE = os.getenv("LOG_SPILL_FILE", "log_spill.txt")
+ADMIN_IDS = {int(i) for i in os.getenv("ADMIN_IDS", "").split(",") if i.strip()}
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 disables /metrics
+INGEST_SWEEP_SECONDS = int(os.getenv("INGEST_SWEEP_SECONDS", "300"))
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "2"))  # parse processes
+PIPELINE_QUEUE = int(os.getenv("PIPELINE_QUEUE", "1000"))
@@ -0,0 +1,134 @@
+import threading
+from array import array
+from bisect import bisect_left
+from datetime import datetime as dt, timezone
+
+from bson import ObjectId
+
+from log import add_log
+
+OID_SIZE = 12
+
+
+def to_epoch_ms(dt_object: dt) -> int:
+    """Mongo stores naive UTC datetimes; aware ones are converted first."""
+    if dt_object.tzinfo is None:
+        dt_object = dt_object.replace(tzinfo=timezone.utc)
+    return int(dt_object.timestamp() * 1000)
+
+
+class TimestampIndex:
+    """
+    Sorted in-process copy of every snapshot timestamp in the prices collection.
+
+    Timestamps are kept as epoch milliseconds in an ``array('q')`` and the
+    matching ``_id`` values as packed 12-byte ObjectIds in a ``bytearray``,
+    so a nearest-snapshot lookup is a bisect with no database round trip.
+    New documents are picked up by polling for ``_id`` values greater than
+    the last one seen.
+    """
+
+    def __init__(self, collection, refresh_interval=30):
+        self.collection = collection
+        self.refresh_interval = refresh_interval
+        self.ready = False
+        self._timestamps = array("q")
+        self._ids = bytearray()
+        self._last_id = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def warm(self):
+        cursor = self.collection.find(
+            {"timestamp": {"$exists": True}}, {"timestamp": 1}
+        )
+        entries = sorted(
+            (to_epoch_ms(doc["timestamp"]), doc["_id"].binary) for doc in cursor
+        )
+        timestamps = array("q", (ts for ts, _ in entries))
+        ids = bytearray(b"".join(oid for _, oid in entries))
+        last_id = max((ObjectId(oid) for _, oid in entries), default=None)
+        with self._lock:
+            self._timestamps = timestamps
+            self._ids = ids
+            self._last_id = last_id
+            self.ready = True
+
+    def refresh(self):
+        query = {"timestamp": {"$exists": True}}
+        if self._last_id is not None:
+            query["_id"] = {"$gt": self._last_id}
+        cursor = self.collection.find(query, {"timestamp": 1}).sort("_id", 1)
+        added = 0
+        for doc in cursor:
+            self.add(doc["_id"], doc["timestamp"])
+            added += 1
+        return added
+
+    def add(self, _id: ObjectId, timestamp: dt):
+        ts = to_epoch_ms(timestamp)
+        with self._lock:
+            pos = bisect_left(self._timestamps, ts)
+            self._timestamps.insert(pos, ts)
+            self._ids[pos * OID_SIZE : pos * OID_SIZE] = _id.binary
+            if self._last_id is None or _id > self._last_id:
+                self._last_id = _id
+
+    def discard(self, _id: ObjectId):
+        """Drop an entry whose document was deleted (e.g. by remove_duplicate)."""
+        with self._lock:
+            pos = self._ids.find(_id.binary)
+            while pos != -1 and pos % OID_SIZE:
+                pos = self._ids.find(_id.binary, pos + 1)
+            if pos == -1:
+                return
+            del self._timestamps[pos // OID_SIZE]
+            del self._ids[pos : pos + OID_SIZE]
+
+    def nearest(self, dt_object: dt, max_distance=None):
+        """
+        Return ``(_id, timestamp_ms)`` of the snapshot closest to ``dt_object``,
+        or None if the index is empty or the closest one is further than
+        ``max_distance`` (a timedelta).
+        """
+        target = to_epoch_ms(dt_object)
+        with self._lock:
+            n = len(self._timestamps)
+            if not n:
+                return None
+            pos = bisect_left(self._timestamps, target)
+            if pos == n or (
+                pos > 0
+                and target - self._timestamps[pos - 1] <= self._timestamps[pos] - target
+            ):
+                pos -= 1
+            ts = self._timestamps[pos]
+            oid = bytes(self._ids[pos * OID_SIZE : (pos + 1) * OID_SIZE])
+        if max_distance is not None and abs(ts - target) > (
+            max_distance.total_seconds() * 1000
+        ):
+            return None
+        return ObjectId(oid), ts
+
+    def start(self):
+        """Warm the index and keep it fresh from a background thread."""
+        self.warm()
+        self._thread = threading.Thread(
+            target=self._poll, name="timestamp-index", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _poll(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Exception in TimestampIndex.refresh: {e}")
+                add_log(f"Exception in TimestampIndex.refresh:\n{e}")
@@ -0,0 +1,112 @@
+"""
+Webhook serving mode: Telegram POSTs updates to a small embedded HTTP server
+instead of the bot long-polling for them.
+
+TLS is expected to be terminated upstream (nginx, a tunnel, ...) which
+forwards WEBHOOK_URL to WEBHOOK_HOST:WEBHOOK_PORT. Requests are acknowledged
+as soon as the update is queued; WEBHOOK_WORKERS threads run the handlers.
+
+    python webhook.py               # register the webhook and serve
+    python webhook.py --local       # no Telegram calls at startup, for
+                                    # modify/load_test_webhook.py
+"""
+
+import json
+import queue
+import sys
+import threading
+from datetime import datetime as dt
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from telebot import types
+
+from log import add_log
+from main import bot, prepare
+from parsers import tehran_tz
+from secret import *
+
+updates = queue.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path != WEBHOOK_PATH:
+            self.send_error(404)
+            return
+        secret = self.headers.get("X-Telegram-Bot-Api-Secret-Token")
+        if WEBHOOK_SECRET and secret != WEBHOOK_SECRET:
+            self.send_error(403)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            update = json.loads(self.rfile.read(length))
+        except ValueError:
+            self.send_error(400)
+            return
+        try:
+            updates.put_nowait(update)
+        except queue.Full:
+            # Telegram retries the delivery later
+            self.send_error(503)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+WEBHOOK_URL_MISSING = (
+    "WEBHOOK_URL is not set: give the public https URL Telegram should post "
+    "to, or run with --local behind an existing webhook registration"
+)
+
+
+def process_updates():
+    while True:
+        update = updates.get()
+        try:
+            bot.process_new_updates([types.Update.de_json(update)])
+        except Exception as e:
+            print(f"Exception in process_updates: {e}")
+            add_log(f"Exception in webhook process_updates:\n{e}")
+        finally:
+            updates.task_done()
+
+
+def serve(register=True):
+    if register and not WEBHOOK_URL:
+        raise ValueError(WEBHOOK_URL_MISSING)
+    # Handlers run on our own workers rather than the bot's internal pool
+    bot.threaded = False
+    for i in range(WEBHOOK_WORKERS):
+        threading.Thread(
+            target=process_updates, name=f"webhook-{i}", daemon=True
+        ).start()
+    if register:
+        bot.remove_webhook()
+        bot.set_webhook(
+            url=f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET or None,
+            max_connections=WEBHOOK_WORKERS,
+        )
+    server = ThreadingHTTPServer((WEBHOOK_HOST, WEBHOOK_PORT), WebhookHandler)
+    print(f"Bot is serving webhook on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH} ...")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    if "--local" in sys.argv[1:]:
+        prepare(register_commands=False)
+        serve(register=False)
+    elif not WEBHOOK_URL:
+        sys.exit(WEBHOOK_URL_MISSING)
+    else:
+        prepare()
+        add_log(f"Bot Started at {dt.now(tehran_tz).strftime('%Y-%m-%d %H:%M:%S')}")
+        serve()
+        add_log(f"Bot Stopped at {dt.now(tehran_tz).strftime('%Y-%m-%d %H:%M:%S')}")